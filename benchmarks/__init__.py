@@ -0,0 +1,7 @@
+"""
+Benchmarks of the framework on the models of the server.
+
+Each module is run separately and prints its results:
+
+    python -m benchmarks.model_init
+"""
@@ -0,0 +1,54 @@
+"""
+Parsing of fixture files: one process against the process pool, and
+YAML against CSV with the values typed by the columns.
+"""
+
+import os
+import tempfile
+
+from framework.db.utils import FixtureCreator
+
+from .utils import measure, print_result
+
+
+FILES = 8
+ROWS_PER_FILE = 10_000
+
+
+def write_files(path: str):
+    for i in range(FILES):
+        with open(os.path.join(path, f"items_{i}.yaml"), "w") as file:
+            file.write("item:\n  depends: [item_type]\n  data:\n")
+            for j in range(ROWS_PER_FILE):
+                file.write(
+                    f"    - item_type_id: 1\n"
+                    f"      name: item_{i}_{j}\n"
+                    f"      description: generated item number {j}\n"
+                )
+
+
+def write_csv_files(path: str):
+    for i in range(FILES):
+        with open(os.path.join(path, f"item.{i}.csv"), "w") as file:
+            file.write("item_type_id,name,description\n")
+            for j in range(ROWS_PER_FILE):
+                file.write(f"1,item_{i}_{j},generated item number {j}\n")
+
+
+def run():
+    count = FILES * ROWS_PER_FILE
+    with tempfile.TemporaryDirectory() as path:
+        write_files(path)
+        sequential = measure(lambda: FixtureCreator(path, workers=1), repeat=3)
+        parallel = measure(lambda: FixtureCreator(path), repeat=3)
+    with tempfile.TemporaryDirectory() as path:
+        write_csv_files(path)
+        columnar = measure(lambda: FixtureCreator(path, "csv"), repeat=3)
+
+    print_result("one process", count, sequential)
+    print_result("process pool", count, parallel, sequential)
+    print_result("csv", count, columnar, sequential)
+
+
+if __name__ == "__main__":
+    run()
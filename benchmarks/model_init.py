@@ -0,0 +1,67 @@
+"""
+Bulk instantiation of models: the generated `__init__` against the old
+one, which scans all the columns of the table for each object.
+
+The password is not passed to `UserModel`, otherwise hashing would take
+almost all the time.
+"""
+
+from server.models import UserModel, ItemModel
+from framework.db.fields import FieldExecutable
+from framework.db.models import ModelWorker
+
+from .utils import measure, print_result
+
+
+COUNT = 10_000
+
+USER_ROWS = [
+    {"login": f"login_{i}", "name": f"name_{i}"}
+    for i in range(COUNT)
+]
+ITEM_ROWS = [
+    {
+        "item_type_id": 1,
+        "name": f"item_{i}",
+        "description": "",
+        "min_level": i % 10,
+    }
+    for i in range(COUNT)
+]
+
+
+def scanning_init(self, *args, **kwargs):
+    """`BaseModel.__init__` before the generated constructors."""
+
+    for (name, field_class) in self.__table__.columns.items():
+        if isinstance(field_class, FieldExecutable):
+            if name in kwargs.keys():
+                kwargs[name] = field_class.execute(kwargs[name])
+            elif not field_class.need_argument:
+                kwargs[name] = field_class.execute()
+    ModelWorker.__init__(self, *args, **kwargs)
+
+
+def bench_model(model, rows):
+    create = lambda: [model(**row) for row in rows]
+    manager = model._sa_class_manager
+
+    generated_init = manager.original_init
+    manager.original_init = scanning_init
+    try:
+        scanning = measure(create)
+    finally:
+        manager.original_init = generated_init
+    generated = measure(create)
+
+    print_result(f"{model.__name__} scanning __init__", len(rows), scanning)
+    print_result(f"{model.__name__} generated __init__", len(rows), generated, scanning)
+
+
+def run():
+    bench_model(UserModel, USER_ROWS)
+    bench_model(ItemModel, ITEM_ROWS)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+"""
+Loading of a catalog table: ORM objects against read-only records, by
+time and by memory of the loaded list.
+"""
+
+import gc
+import tracemalloc
+
+from server.models import ItemModel
+
+from .utils import measure, print_result, db_session
+
+
+COUNT = 50_000
+
+
+def fill_items():
+    ItemModel.objects.bulk_insert(
+        {"item_type_id": 1, "name": f"item_{i}", "description": "d" * 50}
+        for i in range(COUNT)
+    )
+    db_session.commit()
+
+
+def load_objects():
+    objects = ItemModel.objects.query().all()
+    db_session.session.expunge_all()
+    return objects
+
+
+def load_records():
+    return ItemModel.objects.records()
+
+
+def measure_memory(load) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def run():
+    fill_items()
+    count = len(load_records())
+
+    objects_time = measure(load_objects)
+    records_time = measure(load_records)
+    print_result("ORM objects", count, objects_time)
+    print_result("records", count, records_time, objects_time)
+
+    objects_memory = measure_memory(load_objects)
+    records_memory = measure_memory(load_records)
+    print("{:<40} {:>10.2f} MB".format("ORM objects memory", objects_memory / 2 ** 20))
+    print("{:<40} {:>10.2f} MB  x{:.2f}".format(
+        "records memory",
+        records_memory / 2 ** 20,
+        objects_memory / records_memory,
+    ))
+
+
+if __name__ == "__main__":
+    run()
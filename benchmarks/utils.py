@@ -0,0 +1,34 @@
+"""
+Common tools for benchmarks: loading of the project and time measuring.
+"""
+
+import time
+from typing import Callable
+
+import server  # settings, models and tables
+from framework.db.managers import db_session
+
+
+__all__ = ["measure", "print_result", "db_session", "server"]
+
+
+def measure(func: Callable, repeat: int = 5) -> float:
+    """Runs the function several times and returns the best time."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_result(name: str, count: int, seconds: float, base: float = None):
+    line = "{:<40} {:>10.2f} ms {:>12.0f} rows/s".format(
+        name,
+        seconds * 1000,
+        count / seconds,
+    )
+    if base is not None:
+        line += "  x{:.2f}".format(base / seconds)
+    print(line)
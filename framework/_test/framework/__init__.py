@@ -1 +1,26 @@
-__all__ = []
+from .test_buffer import __all__ as __buffer_all__
+from .test_exporter import __all__ as __exporter_all__
+from .test_fixture import __all__ as __fixture_all__
+from .test_index_advisor import __all__ as __index_advisor_all__
+from .test_manager import __all__ as __manager_all__
+from .test_models import __all__ as __models_all__
+from .test_serializer import __all__ as __serializer_all__
+
+from .test_buffer import *
+from .test_exporter import *
+from .test_fixture import *
+from .test_index_advisor import *
+from .test_manager import *
+from .test_models import *
+from .test_serializer import *
+
+
+__all__ = (
+    __buffer_all__ +
+    __exporter_all__ +
+    __fixture_all__ +
+    __index_advisor_all__ +
+    __manager_all__ +
+    __models_all__ +
+    __serializer_all__
+)
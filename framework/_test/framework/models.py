@@ -0,0 +1,109 @@
+"""
+Models that exist only for the framework tests.
+"""
+
+from framework.db.models import (
+    attribute_presetter,
+    presave_action,
+    BaseModel,
+    ModelIndex,
+)
+from framework.db.fields import (
+    IntegerField,
+    StringField,
+    ForeignKeyField,
+    ManyToManyField,
+    PositiveIntegerField,
+)
+
+
+__all__ = [
+    "SampleModel",
+    "SampleTagModel",
+    "SampleAccountModel",
+    "SampleEntryModel",
+    "SampleShelfModel",
+]
+
+
+class SampleModel(BaseModel):
+    name = StringField(40, nullable=False)
+    score = IntegerField(default=0, nullable=False, index=True)
+    code = StringField(40)
+    rank = IntegerField()
+    note = StringField()
+    stock = PositiveIntegerField(default=0, nullable=False)
+
+    presave_calls = []
+
+    class Info:
+        tablename = "test_sample"
+        indexes = [
+            ("name", "score"),
+            ModelIndex("name", unique=True, where="score > 0"),
+        ]
+        deferred = {"notes": ["note"]}
+        load_only = {"short": ["name"]}
+
+    @attribute_presetter("name")
+    def name_setter(self, value):
+        return value.strip()
+
+    @attribute_presetter("code", deferred=True, parallel=True)
+    def code_setter(self, value):
+        return f"{self.name}:{value}"
+
+    @presave_action
+    def set_rank(cls, samples):
+        cls.presave_calls.append(len(samples))
+        for sample in samples:
+            sample.rank = (sample.score or 0) * 10
+
+
+class SampleTagModel(BaseModel):
+    name = StringField(40, nullable=False)
+    samples = ManyToManyField(SampleModel, backref="tags")
+
+    class Info:
+        tablename = "test_sample_tag"
+        natural_key = "name"
+
+
+class SampleAccountModel(BaseModel):
+    money = IntegerField(default=0, nullable=False)
+
+    class Info:
+        tablename = "test_sample_account"
+        versioned = True
+
+
+class SampleEntryModel(BaseModel):
+    sample = ForeignKeyField(SampleModel, backref="entries")
+    tag = ForeignKeyField(
+        SampleTagModel,
+        backref="entries",
+        lazy="selectin",  # wins over `Info.lazy`
+        column_kwargs={"index": False, "nullable": True},
+    )
+
+    class Info:
+        tablename = "test_sample_entry"
+        lazy = {"sample": "joined", "tag": "subquery"}
+
+
+class SampleStockBase(BaseModel):
+    __abstract__ = True
+
+    name = StringField(40)
+    stock = PositiveIntegerField(default=0, nullable=False)
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("name", "default-name")
+        super().__init__(*args, **kwargs)
+
+
+class SampleShelfModel(SampleStockBase):
+    _position = IntegerField()
+
+    class Info:
+        tablename = "test_sample_shelf"
@@ -0,0 +1,130 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from framework.db.managers import DbEngine, WriteBehindBuffer, db_session
+from framework.db.models import ModelWorker
+
+from .models import SampleModel, SampleAccountModel
+
+
+__all__ = ["BufferTest"]
+
+
+class BufferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        db_session.session.query(SampleModel).delete()
+        self.samples = [SampleModel(name=f"sample_{i}", score=i) for i in range(3)]
+        db_session.add(*self.samples)
+        db_session.commit()
+
+    def get_scores(self) -> list[tuple[int, int]]:
+        db_session.session.expire_all()
+        return [(sample.score, sample.stock) for sample in self.samples]
+
+    def test_flush(self):
+        buffer = WriteBehindBuffer(SampleModel)
+        (first, second, _) = self.samples
+        for _ in range(10):
+            buffer.add(first.id, score=1, stock=2)
+        buffer.add(second.id, stock=-5)
+        self.assertEqual(len(buffer), 2)
+
+        # read-your-writes before the flush
+        self.assertEqual(buffer.current(first, "score"), 10)
+        self.assertEqual(buffer.current(second, "stock"), 0)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(self.get_scores(), [(10, 20), (1, 0), (2, 0)])
+        self.assertEqual(buffer.flush(), 0)
+
+        with self.assertRaises(AttributeError):
+            buffer.add(first.id, unknown=1)
+        for name in ("id", "name"):
+            with self.assertRaises(TypeError):
+                buffer.add(first.id, **{name: 1})
+        with self.assertRaises(TypeError):
+            WriteBehindBuffer(SampleAccountModel).add(1, version=1)
+
+    def test_current_after_flush(self):
+        account = SampleAccountModel(money=0)
+        db_session.add(account)
+        db_session.commit()
+
+        buffer = WriteBehindBuffer(SampleAccountModel)
+        buffer.add(account.id, money=50)
+        self.assertEqual(buffer.current(account, "money"), 50)
+        buffer.flush()
+        # without `expire_all`: the flush has expired the loaded object
+        self.assertEqual(buffer.current(account, "money"), 50)
+        self.assertEqual(account.version, 2)
+
+        # the version is up to date, so the ORM update is not stale
+        account.money += 1
+        db_session.commit()
+        self.assertEqual((account.money, account.version), (51, 3))
+
+    def test_max_rows(self):
+        buffer = WriteBehindBuffer(SampleModel, max_rows=2)
+        buffer.add(self.samples[0].id, score=1)
+        self.assertEqual(len(buffer), 1)
+        buffer.add(self.samples[1].id, score=1)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(self.get_scores(), [(1, 0), (2, 0), (2, 0)])
+
+    def test_failed_flush(self):
+        buffer = WriteBehindBuffer(SampleModel)
+        buffer.add(self.samples[0].id, score=1)
+
+        statements = buffer.get_statements
+        buffer.get_statements = lambda pending: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            buffer.flush()
+        self.assertEqual(buffer.get_delta(self.samples[0].id, "score"), 1)
+
+        buffer.get_statements = statements
+        buffer.add(self.samples[0].id, score=2)
+        buffer.flush()
+        self.assertEqual(self.get_scores()[0], (3, 0))
+
+    def test_journal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, "samples.journal")
+            buffer = WriteBehindBuffer(SampleModel, journal=journal)
+            buffer.add(self.samples[0].id, score=4)
+            buffer.add(self.samples[0].id, score=1)
+            buffer.add(self.samples[1].id, stock=3)
+            buffer._journal_file.close()  # "crash" without a flush
+
+            recovered = WriteBehindBuffer(SampleModel, journal=journal)
+            self.assertEqual(recovered.pending, {
+                self.samples[0].id: {"score": 5},
+                self.samples[1].id: {"stock": 3},
+            })
+            recovered.close()
+            self.assertEqual(self.get_scores(), [(5, 0), (1, 3), (2, 0)])
+            with open(journal) as file:
+                self.assertEqual(file.read(), "")
+
+    def test_journal_sync(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, "samples.journal")
+            buffer = WriteBehindBuffer(SampleModel, journal=journal, sync_every=2)
+            buffer.add(self.samples[0].id, score=1)
+            self.assertEqual(buffer.unsynced, 1)
+            buffer.add(self.samples[0].id, score=1)
+            self.assertEqual(buffer.unsynced, 0)
+
+            buffer.add(self.samples[1].id, score=1)
+            buffer.sync_journal()
+            self.assertEqual(buffer.unsynced, 0)
+            # the unsynced deltas are still in the journal for the process
+            buffer.add(self.samples[1].id, stock=1)
+            with open(journal) as file:
+                self.assertEqual(len(file.readlines()), 4)
+            buffer.close()
@@ -0,0 +1,108 @@
+import os
+import gzip
+import json
+import tempfile
+from unittest import TestCase
+
+from framework.db.managers import DbEngine, db_session
+from framework.db.models import ModelWorker
+from framework.db.utils import FixtureCreator, TableExporter
+
+from .models import SampleModel, SampleTagModel
+
+
+__all__ = ["ExporterTest"]
+
+
+class ExporterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        session = db_session.session
+        for table in reversed(ModelWorker.metadata.sorted_tables):
+            if table.name.startswith(("test_", "m2m_test_")):
+                session.execute(table.delete())
+        db_session.commit()
+        session.expunge_all()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+        tag = SampleTagModel(id=1, name="tag")
+        db_session.add(
+            SampleModel(id=1, name="first", score=2, note="with, comma\nand line"),
+            SampleModel(id=2, name="second", tags=[tag]),
+            SampleModel(id=3, name="third", score=-1),
+        )
+        db_session.commit()
+        self.expected = [
+            (sample.id, sample.name, sample.score, sample.note, sample.rank)
+            for sample in SampleModel.objects.query().order_by(SampleModel.id)
+        ]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reload(self, data_type: str):
+        """Loads the exported files into empty tables."""
+
+        for table in reversed(ModelWorker.metadata.sorted_tables):
+            if table.name.startswith(("test_", "m2m_test_")):
+                db_session.session.execute(table.delete())
+        db_session.commit()
+        db_session.session.expunge_all()
+
+        FixtureCreator().create_from_stream(self.path, data_type)
+        return [
+            (sample.id, sample.name, sample.score, sample.note, sample.rank)
+            for sample in SampleModel.objects.query().order_by(SampleModel.id)
+        ]
+
+    def test_ndjson(self):
+        exporter = TableExporter(SampleModel, exclude=["code", "stock"])
+        path = os.path.join(self.path, "samples.ndjson.gz")
+        self.assertEqual(exporter.export(path, SampleModel.score > 0), 1)
+
+        with gzip.open(path, "rt") as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(rows, [{
+            "name": "first",
+            "score": 2,
+            "rank": 20,
+            "note": "with, comma\nand line",
+            "id": 1,
+        }])
+
+        os.remove(path)
+        exporter.export(os.path.join(self.path, "samples.ndjson"), header=True)
+        self.assertEqual(self.reload("ndjson"), self.expected)
+
+    def test_csv(self):
+        TableExporter(SampleModel).export(os.path.join(self.path, "test_sample.csv"))
+        self.assertEqual(self.reload("csv"), self.expected)
+
+    def test_yaml(self):
+        links = FixtureCreator().models["m2m_test_sample_test_sample_tag"]
+        for model in (SampleModel, SampleTagModel, links):
+            filename = f"{model.__tablename__}.yaml"
+            TableExporter(model).export(os.path.join(self.path, filename))
+
+        self.assertEqual(self.reload("yaml"), self.expected)
+        self.assertEqual(
+            [tag.name for tag in db_session.session.get(SampleModel, 2).tags],
+            ["tag"],
+        )
+
+    def test_fields(self):
+        exporter = TableExporter(SampleModel, fields=["id", "name"])
+        path = os.path.join(self.path, "samples.csv")
+        self.assertEqual(exporter.export(path, compress=True), 3)
+        with gzip.open(path, "rt") as file:
+            self.assertEqual(file.read(), "id,name\n1,first\n2,second\n3,third\n")
+
+        with self.assertRaises(ValueError):
+            TableExporter(SampleModel, fields=["unknown"])
+        with self.assertRaises(ValueError):
+            exporter.export(os.path.join(self.path, "samples.xml"))
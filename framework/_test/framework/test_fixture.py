@@ -0,0 +1,280 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+
+from framework.db.managers import DbEngine, db_session
+from framework.db.models import ModelWorker
+from framework.db.utils import FixtureCreator
+
+from .models import SampleModel, SampleTagModel
+
+
+__all__ = ["FixtureTest"]
+
+
+SAMPLES_STREAM = """\
+--- {__table__: test_sample}
+--- {id: 1, name: first, score: 1}
+--- {id: 2, name: second, score: 2}
+--- {__table__: test_sample_tag}
+--- {id: 1, name: tag}
+--- {id: 2, name: other tag}
+"""
+
+LINKS_STREAM = [
+    {
+        "__table__": "m2m_test_sample_test_sample_tag",
+        "__depends__": ["test_sample", "test_sample_tag"],
+    },
+    {"test_sample_id": 1, "test_sample_tag_id": 1},
+    {"test_sample_id": 2, "test_sample_tag_id": 1},
+    {"test_sample_id": 2, "test_sample_tag_id": 2},
+]
+
+
+class FixtureTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        session = db_session.session
+        for table in reversed(ModelWorker.metadata.sorted_tables):
+            if table.name.startswith(("test_", "m2m_test_")):
+                session.execute(table.delete())
+        db_session.commit()
+        session.expunge_all()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, filename: str, content: str):
+        with open(os.path.join(self.path, filename), "w") as file:
+            file.write(content)
+
+    def test_parallel_parsing(self):
+        for i in range(4):
+            self.write(f"samples_{i}.yaml", (
+                "test_sample:\n"
+                "  depends: [test_sample_tag]\n"
+                "  data:\n"
+                f"    - {{name: sample_{i}_0}}\n"
+                f"    - {{name: sample_{i}_1}}\n"
+            ))
+
+        sequential = FixtureCreator(self.path, workers=1).data
+        creator = FixtureCreator(workers=2)
+        creator.parallel_min_size = 0
+        creator.add_data_from_type(self.path)
+
+        self.assertEqual(creator.data, sequential)
+        names = [row["name"] for row in creator.data["test_sample"]["data"]]
+        self.assertEqual(names, [f"sample_{i}_{j}" for i in range(4) for j in range(2)])
+
+    def test_create_fast(self):
+        creator = FixtureCreator()
+        creator.add_data({
+            "m2m_test_sample_test_sample_tag": {
+                "depends": ["test_sample", "test_sample_tag"],
+                "data": [{"test_sample_id": 1, "test_sample_tag_id": 1}],
+            },
+            "test_sample": {"data": [{"id": 1, "name": " first ", "score": 3}]},
+            "test_sample_tag": {"data": [{"id": 1, "name": "tag"}]},
+        })
+
+        report = creator.create_fast()
+        levels = {
+            tablename: level
+            for (tablename, (level, _, _)) in report.tables.items()
+        }
+        self.assertEqual(levels, {
+            "test_sample": 0,
+            "test_sample_tag": 0,
+            "m2m_test_sample_test_sample_tag": 1,
+        })
+        self.assertEqual(report.total_count, 3)
+
+        sample = db_session.session.get(SampleModel, 1)
+        self.assertEqual((sample.name, sample.rank), ("first", 30))
+        self.assertEqual([tag.name for tag in sample.tags], ["tag"])
+
+    def test_create_cached(self):
+        data_path = os.path.join(self.path, "data")
+        cache_path = os.path.join(self.path, "cache")
+        os.mkdir(data_path)
+        with open(os.path.join(data_path, "samples.yaml"), "w") as file:
+            file.write("test_sample:\n  data:\n    - {name: cached, score: 2}\n")
+
+        self.assertFalse(FixtureCreator().create_cached(data_path, cache_path))
+        self.assertEqual(len(os.listdir(cache_path)), 1)
+
+        db_session.session.query(SampleModel).update({"name": "changed"})
+        db_session.commit()
+        self.assertTrue(FixtureCreator().create_cached(data_path, cache_path))
+        names = [sample.name for sample in SampleModel.objects.query()]
+        self.assertEqual(names, ["cached"])
+
+        # another key - another snapshot
+        creator = FixtureCreator()
+        self.assertFalse(creator.create_cached(data_path, cache_path, extra_key="1"))
+        self.assertEqual(len(os.listdir(cache_path)), 2)
+
+    def test_sync(self):
+        creator = FixtureCreator()
+        creator.add_data({"test_sample": {"data": [
+            {"id": 1, "name": "first", "score": 1},
+            {"id": 2, "name": "second", "score": 2, "stock": -1},
+        ]}})
+        creator.create_fast()
+        db_session.add(SampleModel(id=3, name="extra"))
+        db_session.commit()
+
+        self.assertFalse(creator.sync(dry_run=True))
+        rows = creator.data["test_sample"]["data"]
+        rows[0]["score"] = 10
+        rows[1]["name"] = " renamed "  # through the presetter
+        rows.append({"id": 4, "name": "fourth"})
+
+        diff = creator.sync(dry_run=True, delete_missing=True)
+        table_diff = diff.tables["test_sample"]
+        self.assertEqual([row["id"] for row in table_diff.inserts], [4])
+        self.assertEqual(table_diff.updates, [
+            # `rank` is derived from `score` by the presave action
+            ((1,), (1,), {"score": (1, 10), "rank": (10, 100)}),
+            ((2,), (2,), {"name": ("second", "renamed")}),
+        ])
+        self.assertEqual(table_diff.deletes, [((3,), (3,))])
+        self.assertIn("~ test_sample (id=1)\n    score: 1 -> 10", str(diff))
+        self.assertEqual(SampleModel.objects.query().count(), 3)
+
+        creator.sync(delete_missing=True)
+        db_session.session.expire_all()
+        samples = SampleModel.objects.query().order_by(SampleModel.id).all()
+        self.assertEqual([sample.id for sample in samples], [1, 2, 4])
+        self.assertEqual((samples[0].score, samples[0].rank), (10, 100))
+        self.assertEqual(samples[1].name, "renamed")
+        self.assertFalse(creator.sync(dry_run=True, delete_missing=True))
+
+        rows.append({"name": "without key"})
+        with self.assertRaises(ValueError):
+            creator.sync(dry_run=True)
+
+    def test_references(self):
+        creator = FixtureCreator()
+        creator.add_data({
+            "m2m_test_sample_test_sample_tag": {
+                "depends": ["test_sample", "test_sample_tag"],
+                "data": [
+                    # a sample without a natural key is referenced by `id`
+                    {"test_sample": 1, "test_sample_tag": "tag"},
+                    {"test_sample": 2, "test_sample_tag": "other tag"},
+                ],
+            },
+            "test_sample": {"data": [
+                {"id": 1, "name": "first"},
+                {"id": 2, "name": "second"},
+            ]},
+            "test_sample_tag": {"data": [{"name": "tag"}, {"name": "other tag"}]},
+        })
+        creator.create()
+
+        tags = SampleTagModel.objects.query().order_by(SampleTagModel.name).all()
+        self.assertEqual(
+            [(tag.name, [sample.name for sample in tag.samples]) for tag in tags],
+            [("other tag", ["second"]), ("tag", ["first"])],
+        )
+
+        # a dry run refers to the rows that it would insert
+        creator.data["test_sample_tag"]["data"].append({"name": "new tag"})
+        creator.data["m2m_test_sample_test_sample_tag"]["data"].append(
+            {"test_sample": 1, "test_sample_tag": "new tag"},
+        )
+        diff = creator.sync(dry_run=True)
+        (link,) = diff.tables["m2m_test_sample_test_sample_tag"].inserts
+        self.assertEqual(
+            repr(link["test_sample_tag_id"]),
+            "<new test_sample_tag ('new tag',)>",
+        )
+
+        creator.data["m2m_test_sample_test_sample_tag"]["data"].append(
+            {"test_sample": 1, "test_sample_tag": "unknown"},
+        )
+        with self.assertRaises(ValueError):
+            creator.sync(dry_run=True)
+
+    def test_create_from_stream(self):
+        self.write("links.yaml", "--- {__table__: test_sample, __depends__: []}\n")
+        self.write("samples.yaml", SAMPLES_STREAM)
+        self.write("links.ndjson", "".join(
+            json.dumps(document) + "\n"
+            for document in LINKS_STREAM
+        ))
+
+        counts = FixtureCreator().create_from_stream(self.path, chunk_size=1)
+        self.assertEqual(counts, {"test_sample": 2, "test_sample_tag": 2})
+        counts = FixtureCreator().create_from_stream(self.path, "ndjson")
+        self.assertEqual(counts, {"m2m_test_sample_test_sample_tag": 3})
+
+        tag = db_session.session.get(SampleTagModel, 1)
+        names = sorted(sample.name for sample in tag.samples)
+        self.assertEqual(names, ["first", "second"])
+        # rows go through the model
+        self.assertEqual(db_session.session.get(SampleModel, 2).rank, 20)
+
+    def test_columnar_formats(self):
+        self.write("test_sample.csv", (
+            "id,name,score,note\n"
+            "1,first,3,\n"
+            "2,second,,a note\n"
+        ))
+        self.write("m2m_test_sample_test_sample_tag.csv", (
+            "test_sample,test_sample_tag\n"
+            "1,tag\n"
+            "2,tag\n"
+        ))
+        self.write("tags.ndjson", (
+            '{"__table__": "test_sample_tag"}\n'
+            '{"id": "1", "name": "tag"}\n'
+        ))
+
+        creator = FixtureCreator(self.path, "csv")
+        rows = creator.data["test_sample"]["data"]
+        # typed by the columns, empty cells are left to the defaults
+        self.assertEqual(rows[0], {"id": 1, "name": "first", "score": 3})
+        self.assertEqual(rows[1], {"id": 2, "name": "second", "note": "a note"})
+        self.assertEqual(
+            sorted(creator.data["m2m_test_sample_test_sample_tag"]["depends"]),
+            ["test_sample", "test_sample_tag"],
+        )
+        creator.add_data_from_type(self.path, "ndjson")
+        tags = creator.data["test_sample_tag"]["data"]
+        self.assertEqual(tags, [{"id": 1, "name": "tag"}])
+
+        counts = FixtureCreator().create_from_stream(self.path, "ndjson")
+        self.assertEqual(counts, {"test_sample_tag": 1})
+        counts = FixtureCreator().create_from_stream(self.path, "csv")
+        self.assertEqual(counts, {
+            "test_sample": 2,
+            "m2m_test_sample_test_sample_tag": 2,
+        })
+
+        sample = db_session.session.get(SampleModel, 1)
+        self.assertEqual((sample.score, sample.rank), (3, 30))
+        tag = db_session.session.get(SampleTagModel, 1)
+        names = sorted(sample.name for sample in tag.samples)
+        self.assertEqual(names, ["first", "second"])
+
+        self.write("test_sample.csv", "id,name,score\n3,third,many\n")
+        with self.assertRaises(ValueError):
+            FixtureCreator(self.path, "csv")
+
+    def test_stream_errors(self):
+        self.write("samples.ndjson", '{"name": "no header"}\n')
+        with self.assertRaises(ValueError):
+            FixtureCreator().create_from_stream(self.path, "ndjson")
+        with self.assertRaises(ValueError):
+            FixtureCreator().create_from_stream(self.path, "xml")
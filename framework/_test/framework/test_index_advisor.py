@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from sqlalchemy import Column, Index, Integer, MetaData, Table, text
+
+from framework.db.managers import DbEngine, db_session
+from framework.db.models import ModelWorker
+from framework.db.utils import IndexAdvisor
+
+from .models import SampleModel
+
+
+__all__ = ["IndexAdvisorTest"]
+
+
+class IndexAdvisorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        db_session.session.query(SampleModel).delete()
+        db_session.add(*[
+            SampleModel(name=f"sample_{i}", score=i, code=str(i), note=str(i))
+            for i in range(20)
+        ])
+        db_session.commit()
+
+    def test_suggestions(self):
+        query = SampleModel.objects.query
+        with IndexAdvisor() as advisor:
+            for i in range(30):
+                query().filter(SampleModel.code == str(i)).all()
+            query().filter(SampleModel.note == "1").all()
+            # `name` is the first column of the `(name, score)` index
+            query().filter(SampleModel.name == "sample_1").all()
+            query().order_by(SampleModel.rank).all()
+        # the recording has stopped
+        query().filter(SampleModel.stock == 1).all()
+
+        suggestions = advisor.analyze()
+        fields = [suggestion.fields for suggestion in suggestions]
+        self.assertEqual(fields[0], ("code",))  # the most time
+        self.assertEqual(sorted(fields), [("code",), ("note",), ("rank",)])
+
+        code = suggestions[0]
+        self.assertEqual(code.count, 30)
+        self.assertEqual(code.reasons, {"full scan"})
+        self.assertGreater(code.total_time, suggestions[1].total_time)
+        rank = next(s for s in suggestions if s.fields == ("rank",))
+        self.assertEqual(rank.reasons, {"temp b-tree sort"})
+        self.assertIn("SampleModel: Info.indexes += ['code']", advisor.report())
+
+        advisor.clear()
+        self.assertEqual(advisor.report(), "No index suggestions")
+
+    def test_partial_index(self):
+        table = Table(
+            "partial_sample",
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("login", Integer),
+            Column("code", Integer),
+            Index("ix_login", "login", sqlite_where=text("code > 0")),
+            Index("ix_code", "code"),
+        )
+        # a partial index only covers the queries with its condition
+        self.assertFalse(IndexAdvisor.is_indexed(table, ("login",)))
+        self.assertTrue(IndexAdvisor.is_indexed(table, ("code",)))
+        self.assertTrue(IndexAdvisor.is_indexed(table, ("id",)))
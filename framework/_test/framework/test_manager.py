@@ -0,0 +1,269 @@
+from unittest import TestCase
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+from framework.db.managers import BasePeel, DbEngine, db_session
+from framework.db.managers.manager import InvalidCursorError
+from framework.db.models import ModelWorker
+
+from .models import (
+    SampleModel,
+    SampleTagModel,
+    SampleEntryModel,
+    SampleShelfModel,
+)
+
+
+__all__ = ["ManagerTest", "PeelTest"]
+
+
+class SamplePeel(BasePeel):
+    Model = SampleModel
+
+
+class ManagerTest(TestCase):
+    scores = [5, 1, 3, 3, 8, 1, 3]
+
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        db_session.session.query(SampleEntryModel).delete()
+        db_session.session.query(SampleModel).delete()
+        db_session.add(*[
+            SampleModel(name=f"sample_{i}", score=score)
+            for (i, score) in enumerate(self.scores)
+        ])
+        db_session.commit()
+
+    def test_paginate(self):
+        expected = [
+            (row.score, row.id)
+            for row in SampleModel.objects.query().all()
+        ]
+
+        for descending in (False, True):
+            result = []
+            cursor = None
+            while True:
+                page = SampleModel.objects.paginate(
+                    "score", cursor, limit=3, descending=descending)
+                self.assertTrue(len(page) <= 3)
+                result += [(row.score, row.id) for row in page]
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            self.assertEqual(result, sorted(expected, reverse=descending))
+
+    def test_paginate_wrong_cursor(self):
+        cursor = SampleModel.objects.paginate("score", limit=1).next_cursor
+        with self.assertRaises(InvalidCursorError):
+            SampleModel.objects.paginate("name", cursor)
+        with self.assertRaises(InvalidCursorError):
+            SampleModel.objects.paginate("score", cursor, descending=True)
+        with self.assertRaises(InvalidCursorError):
+            SampleModel.objects.paginate("score", "not a cursor")
+
+    def test_stream(self):
+        names = [row.name for row in SampleModel.objects.stream(batch_size=2)]
+        self.assertEqual(len(names), len(self.scores))
+        self.assertEqual(set(names), {f"sample_{i}" for i in range(7)})
+
+    def test_deferred(self):
+        session = db_session.session
+        session.expunge_all()
+        sample = SampleModel.objects.query().first()
+        self.assertNotIn("note", sample.__dict__)
+        self.assertIn("score", sample.__dict__)
+
+        session.expunge_all()
+        sample = SampleModel.objects.query(undefer=["notes"]).first()
+        self.assertIn("note", sample.__dict__)
+
+        session.expunge_all()
+        sample = SampleModel.objects.query(profile="short").first()
+        self.assertIn("name", sample.__dict__)
+        self.assertNotIn("score", sample.__dict__)
+        self.assertEqual(sample.score, 5)
+
+        with self.assertRaises(ValueError):
+            SampleModel.objects.query(profile="unknown")
+
+    def test_query_count(self):
+        # field columns can be copied into subqueries
+        self.assertEqual(SampleModel.objects.query().count(), len(self.scores))
+        with self.assertRaises(ValueError):
+            SampleModel.objects.query(load={"name": "eager"})
+
+    def test_lazy(self):
+        relationships = SampleEntryModel.__mapper__.relationships
+        self.assertEqual(relationships["sample"].lazy, "joined")  # `Info.lazy`
+        self.assertEqual(relationships["tag"].lazy, "selectin")  # the field
+
+    def test_query_load(self):
+        sample_id = SampleModel.objects.query().first().id
+        db_session.add(SampleEntryModel(test_sample_id=sample_id))
+        db_session.commit()
+        db_session.session.expunge_all()
+
+        # joined by default
+        entry = SampleEntryModel.objects.query().one()
+        self.assertIn("sample", entry.__dict__)
+        self.assertEqual(entry.sample.id, sample_id)
+        db_session.session.expunge_all()
+
+        entry = SampleEntryModel.objects.query(load={"sample": "noload"}).one()
+        self.assertIsNone(entry.sample)
+        db_session.session.expunge_all()
+
+        entry = SampleEntryModel.objects.query(load={"sample": "raise"}).one()
+        with self.assertRaises(InvalidRequestError):
+            entry.sample
+        db_session.session.expunge_all()
+
+    def test_records(self):
+        records = SampleModel.objects.records(
+            SampleModel.score == 3, order_by=SampleModel.id)
+        self.assertEqual([record.score for record in records], [3, 3, 3])
+        self.assertIsInstance(records[0], SampleModel.__record__)
+        with self.assertRaises(AttributeError):
+            records[0].score = 4
+
+        streamed = list(SampleModel.objects.stream_records(batch_size=2))
+        self.assertEqual(len(streamed), len(self.scores))
+
+        # a column key, which cannot be a name of a tuple field
+        db_session.add(SampleShelfModel(name="shelf", _position=3))
+        db_session.commit()
+        record = SampleShelfModel.objects.records()[0]
+        self.assertEqual((record.name, record._2), ("shelf", 3))
+        db_session.session.query(SampleShelfModel).delete()
+        db_session.commit()
+
+    def test_validate_many(self):
+        result = SampleModel.objects.validate_many([
+            {"name": "first", "score": "3"},
+            {"score": "many"},
+            {"name": "third"},
+        ])
+        self.assertFalse(result.is_valid)
+        self.assertEqual(result.valid_indexes, [0, 2])
+        # only the passed fields, the defaults are left to the database
+        self.assertEqual(result.valid, [
+            {"name": "first", "score": 3},
+            {"name": "third"},
+        ])
+        # the index of the row is not a part of the location
+        locations = sorted(error["loc"] for error in result.errors[1])
+        self.assertEqual(locations, [("name",), ("score",)])
+
+        result = SampleModel.objects.validate_many([{"name": "valid"}])
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.valid_indexes, [0])
+
+    def test_bulk_insert(self):
+        inserts = []
+
+        def count_inserts(conn, cursor, statement, params, context, executemany):
+            if statement.startswith("INSERT"):
+                inserts.append(len(params) if executemany else 1)
+
+        event.listen(DbEngine, "before_cursor_execute", count_inserts)
+        try:
+            count = SampleModel.objects.bulk_insert([
+                {"name": "x", "score": 1},
+                {"name": "v", "score": 3},
+                {"name": "y"},
+                {"name": "z", "score": 2},
+                {"name": "w", "score": 4, "note": "note"},
+            ])
+        finally:
+            event.remove(DbEngine, "before_cursor_execute", count_inserts)
+        db_session.commit()
+
+        # one `executemany` for each run of rows with the same fields
+        self.assertEqual(count, 5)
+        self.assertEqual(inserts, [2, 1, 1, 1])
+        # the ids follow the order of the rows
+        samples = SampleModel.objects.query().order_by(SampleModel.id)
+        names = [sample.name for sample in samples]
+        self.assertEqual(names[-5:], ["x", "v", "y", "z", "w"])
+
+        rows = {
+            sample.name: (sample.score, sample.rank, sample.note)
+            for sample in SampleModel.objects.query()
+        }
+        # the missing fields get the defaults, presave actions are applied
+        self.assertEqual(rows["y"], (0, 0, None))
+        self.assertEqual(rows["z"], (2, 20, None))
+        self.assertEqual(rows["w"], (4, 40, "note"))
+
+    def test_increment(self):
+        samples = SampleModel.objects.query().order_by(SampleModel.id).all()
+        ids = [sample.id for sample in samples[:2]]
+
+        self.assertEqual(SampleModel.increment(ids, score=10, stock=5), 2)
+        self.assertEqual([samples[0].score, samples[1].score], [15, 11])
+        self.assertEqual(samples[2].score, 3)
+
+        # `stock` is a positive field, it is clamped to 0
+        SampleModel.increment(ids, stock=-7)
+        self.assertEqual([samples[0].stock, samples[1].stock], [0, 0])
+
+        with self.assertRaises(TypeError):
+            SampleModel.increment(ids, name=1)
+        with self.assertRaises(AttributeError):
+            SampleModel.increment(ids, unknown=1)
+        db_session.session.rollback()
+
+    def test_m2m_link(self):
+        tag = SampleTagModel(name="tag")
+        db_session.add(tag)
+        db_session.commit()
+        samples = SampleModel.objects.query().order_by(SampleModel.id).all()
+        self.assertEqual(tag.samples, [])
+
+        pairs = [(tag.id, sample.id) for sample in samples[:3]]
+        self.assertEqual(SampleTagModel.m2m_link("samples", pairs), 3)
+        self.assertEqual(tag.samples, samples[:3])
+        self.assertEqual(samples[0].tags, [tag])
+
+        pairs = [(tag.id, sample.id) for sample in samples[:4]]
+        count = SampleTagModel.m2m_link("samples", pairs, ignore_conflicts=True)
+        self.assertEqual(count, 1)
+        self.assertEqual(len(tag.samples), 4)
+
+        self.assertEqual(SampleTagModel.m2m_unlink("samples", pairs[:2]), 2)
+        self.assertEqual(tag.samples, samples[2:4])
+        self.assertEqual(samples[0].tags, [])
+
+        with self.assertRaises(AttributeError):
+            SampleTagModel.m2m_link("name", pairs)
+        db_session.session.rollback()
+
+
+class PeelTest(TestCase):
+    def test_peel(self):
+        peel = SamplePeel()
+        peel.name = "peel"
+        self.assertEqual(peel.model.name, "peel")
+        self.assertEqual(peel.name, "peel")
+        self.assertFalse(hasattr(peel, "__dict__"))
+
+        with self.assertRaises(AttributeError):
+            peel.unknown = 1
+        with self.assertRaises(AttributeError):
+            _ = peel.unknown
+
+        sample = SampleModel(name="sample")
+        self.assertIs(SamplePeel(sample).model, sample)
+        with self.assertRaises(TypeError):
+            SamplePeel(object())
+
+    def test_wrap_many(self):
+        samples = [SampleModel(name=f"sample_{i}") for i in range(3)]
+        peels = SamplePeel.wrap_many(samples)
+        self.assertEqual([peel.model for peel in peels], samples)
+        self.assertEqual([peel.name for peel in peels], ["sample_0", "sample_1", "sample_2"])
@@ -0,0 +1,186 @@
+from unittest import TestCase
+
+from sqlalchemy import update
+from sqlalchemy.orm.exc import StaleDataError
+
+from framework.db.fields import PositiveIntegerField
+from framework.db.managers import DbEngine, db_session, retry_on_stale
+from framework.db.models import ModelIndex, ModelWorker
+
+from .models import (
+    SampleModel,
+    SampleTagModel,
+    SampleAccountModel,
+    SampleEntryModel,
+    SampleShelfModel,
+)
+
+
+__all__ = ["ModelsTest"]
+
+
+class ModelsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        db_session.session.query(SampleModel).delete()
+        db_session.commit()
+
+    def test_info_indexes(self):
+        indexes = {
+            index.name: index
+            for index in SampleModel.__table__.indexes
+        }
+
+        composite = indexes["ix_test_sample_name_score"]
+        self.assertEqual([c.name for c in composite.columns], ["name", "score"])
+        self.assertFalse(composite.unique)
+
+        partial = indexes["ux_test_sample_name_partial"]
+        self.assertTrue(partial.unique)
+        self.assertEqual(str(partial.dialect_options["sqlite"]["where"]), "score > 0")
+
+    def test_relation_indexes(self):
+        indexed = {
+            tuple(column.name for column in index.columns): index.unique
+            for index in SampleEntryModel.__table__.indexes
+        }
+        # foreign keys are indexed by default, `index=False` opts out
+        self.assertIn(("test_sample_id",), indexed)
+        self.assertNotIn(("test_sample_tag_id",), indexed)
+
+        through = SampleTagModel.__mapper__.relationships["samples"].secondary
+        indexed = {
+            tuple(column.name for column in index.columns): index.unique
+            for index in through.indexes
+        }
+        self.assertEqual(indexed, {
+            ("id",): True,
+            # the first column is indexed by the pair
+            ("test_sample_id",): False,
+            ("test_sample_tag_id", "test_sample_id"): True,
+        })
+
+    def test_model_index_from_info(self):
+        self.assertEqual(ModelIndex.from_info("name").fields, ("name",))
+        self.assertEqual(ModelIndex.from_info(("a", "b")).fields, ("a", "b"))
+        index = ModelIndex("a", unique=True)
+        self.assertIs(ModelIndex.from_info(index), index)
+        with self.assertRaises(TypeError):
+            ModelIndex.from_info(1)
+        with self.assertRaises(ValueError):
+            ModelIndex()
+
+    def test_abstract_base_fields(self):
+        # the column copied from the abstract base keeps its field class
+        stock = SampleShelfModel.__table__.columns["stock"]
+        self.assertIsInstance(stock, PositiveIntegerField)
+        self.assertEqual(SampleShelfModel(stock=-3).stock, 0)
+
+        shelf = SampleShelfModel(name="shelf", stock=2)
+        db_session.add(shelf)
+        db_session.commit()
+        SampleShelfModel.increment([shelf.id], stock=-5)
+        self.assertEqual(shelf.stock, 0)
+        db_session.session.query(SampleShelfModel).delete()
+        db_session.commit()
+
+    def test_base_init(self):
+        # the `__init__` of the abstract base is not replaced by the
+        # generated one, and the executable fields are still executed
+        self.assertEqual(SampleShelfModel().name, "default-name")
+        self.assertEqual(SampleShelfModel(name="shelf").name, "shelf")
+        self.assertEqual(SampleShelfModel(stock=-3).stock, 0)
+
+    def test_min_max_field(self):
+        self.assertEqual(SampleModel(name="sample", stock=4).stock, 4)
+        self.assertEqual(SampleModel(name="sample", stock=-3).stock, 0)
+
+    def test_presetter(self):
+        sample = SampleModel(name="  first  ")
+        self.assertEqual(sample.name, "first")
+        sample.name = " second"
+        self.assertEqual(sample.name, "second")
+        sample.score = 10
+        self.assertEqual(sample.score, 10)
+        self.assertNotIn("__setattr__", SampleModel.__dict__)
+
+    def test_deferred_presetter(self):
+        samples = [SampleModel(code=str(i), name=f"name_{i}") for i in range(5)]
+        self.assertEqual([sample.code for sample in samples], list("01234"))
+
+        db_session.add(*samples)
+        db_session.commit()
+        self.assertEqual(
+            [sample.code for sample in samples],
+            [f"name_{i}:{i}" for i in range(5)],
+        )
+
+        samples[0].code = "new"
+        db_session.commit()
+        self.assertEqual(samples[0].code, "name_0:new")
+
+    def test_presave_actions(self):
+        SampleModel.presave_calls.clear()
+        samples = [SampleModel(name=f"name_{i}", score=i) for i in range(4)]
+        db_session.add(*samples)
+        db_session.commit()
+        self.assertEqual(SampleModel.presave_calls, [4])
+        self.assertEqual([sample.rank for sample in samples], [0, 10, 20, 30])
+
+        samples[1].score = 5
+        db_session.commit()
+        self.assertEqual(SampleModel.presave_calls, [4, 1])
+        self.assertEqual(samples[1].rank, 50)
+
+        samples[2]._set_presave()
+        self.assertEqual(SampleModel.presave_calls, [4, 1, 1])
+
+    def test_versioned(self):
+        account = SampleAccountModel(money=10)
+        db_session.add(account)
+        db_session.commit()
+        self.assertEqual(account.version, 1)
+
+        account.money += 5
+        db_session.commit()
+        self.assertEqual(account.version, 2)
+
+        SampleAccountModel.increment([account.id], money=1)
+        self.assertEqual((account.money, account.version), (16, 3))
+
+        # the row is changed behind the back of the loaded object
+        table = SampleAccountModel.__table__
+        db_session.session.execute(
+            update(table).values(version=table.c.version + 1))
+        account.money = 0
+        with self.assertRaises(StaleDataError):
+            db_session.commit()
+        db_session.rollback()
+
+    def test_retry_on_stale(self):
+        account = SampleAccountModel(money=10)
+        db_session.add(account)
+        db_session.commit()
+        table = SampleAccountModel.__table__
+        calls = []
+
+        @retry_on_stale(attempts=2)
+        def spend(price: int):
+            calls.append(price)
+            account.money -= price
+            if len(calls) == 1:
+                # a concurrent purchase
+                with db_session.session.no_autoflush:
+                    db_session.session.execute(update(table).values(
+                        money=table.c.money - 3,
+                        version=table.c.version + 1,
+                    ))
+
+        spend(2)
+        self.assertEqual(calls, [2, 2])
+        # the "concurrent" change was made in the same connection, so it
+        # is rolled back together with the first attempt
+        self.assertEqual(account.money, 8)
@@ -0,0 +1,92 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import TestCase
+
+from pydantic import ValidationError
+
+from framework.db.managers import DbEngine, db_session
+from framework.db.models import ModelWorker
+from framework.db.utils import JsonSerializer, generate_pydantic_model
+
+from .models import SampleModel
+
+
+__all__ = ["SchemaTest", "SerializerTest"]
+
+
+class SchemaTest(TestCase):
+    def get_fields(self, variant: str) -> set[str]:
+        schema = generate_pydantic_model(SampleModel, variant)
+        fields = getattr(schema, "model_fields", None) or schema.__fields__
+        return set(fields)
+
+    def test_variants(self):
+        read = generate_pydantic_model(SampleModel, "read")
+        with self.assertRaises(ValidationError):
+            read(name="sample")  # the primary key is required
+
+        create = generate_pydantic_model(SampleModel, "create")
+        # the primary key and the fields with defaults are filled in
+        self.assertEqual(create(name="sample").name, "sample")
+        with self.assertRaises(ValidationError):
+            create(score=1)
+
+        update = generate_pydantic_model(SampleModel, "update")
+        self.assertIsNone(update().name)
+        self.assertNotIn("id", self.get_fields("update"))
+        self.assertIn("id", self.get_fields("create"))
+
+        with self.assertRaises(ValueError):
+            generate_pydantic_model(SampleModel, "delete")
+
+    def test_cache(self):
+        for variant in ("read", "create", "update"):
+            self.assertIs(
+                generate_pydantic_model(SampleModel, variant),
+                generate_pydantic_model(SampleModel, variant),
+            )
+        self.assertIsNot(
+            generate_pydantic_model(SampleModel, "read"),
+            generate_pydantic_model(SampleModel, "create"),
+        )
+
+
+class SerializerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        db_session.session.query(SampleModel).delete()
+        db_session.add(SampleModel(id=1, name="first", score=2))
+        db_session.commit()
+
+    def test_dumps(self):
+        serializer = JsonSerializer(SampleModel, exclude=["note", "code"])
+        self.assertEqual(
+            set(serializer.fields),
+            {"id", "name", "score", "rank", "stock"},
+        )
+
+        sample = SampleModel.objects.query().one()
+        (record,) = SampleModel.objects.records()
+        # objects and Core rows give the same result
+        for rows in ([sample], [record]):
+            (data,) = serializer.to_dicts(rows)
+            self.assertEqual(data["name"], "first")
+            self.assertEqual((data["score"], data["rank"]), (2, 20))
+
+        self.assertEqual(
+            JsonSerializer(SampleModel, fields=["name"]).dumps([sample]),
+            b'[{"name":"first"}]',
+        )
+
+    def test_backends(self):
+        row = SimpleNamespace(name="first", score=Decimal("1.5"))
+        for backend in JsonSerializer.backends:
+            serializer = JsonSerializer(SampleModel, ["name", "score"], backend=backend)
+            self.assertEqual(serializer.dumps_one(row), b'{"name":"first","score":1.5}')
+            self.assertEqual(serializer.dumps([row]), b'[{"name":"first","score":1.5}]')
+
+        with self.assertRaises(ValueError):
+            JsonSerializer(SampleModel, backend="unknown")
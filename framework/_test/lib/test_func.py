@@ -72,3 +72,11 @@ class FuncTest(TestCase):
         self.assertEqual(camel_to_snake("TestString123"), "test_string123")
         self.assertEqual(camel_to_snake("123TestString"), "123_test_string")
         self.assertEqual(camel_to_snake("1234567"), "1234567")
+
+    def test_chunked(self):
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunked(range(4), 2)), [[0, 1], [2, 3]])
+        self.assertEqual(list(chunked([], 3)), [])
+        self.assertEqual(list(chunked(iter("abc"), 5)), [["a", "b", "c"]])
+        with self.assertRaises(ValueError):
+            list(chunked(range(5), 0))
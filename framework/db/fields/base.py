@@ -69,6 +69,20 @@ class FieldDefault(ABC, Column, metaclass=FieldDefaultMeta):
     def __repr__(self):
         return super().__repr__().replace("Column", self.__class__.__name__)
 
+    @property
+    def _constructor(self):
+        return self._construct_copy
+
+    def _construct_copy(self, *args, **kwargs):
+        if "_proxies" in kwargs:
+            # a proxy of the column in an alias, subquery or `selectin` /
+            # `joined` loader: it is made with the standard `Column`
+            # arguments, which the field classes do not take, and is only
+            # used in selects
+            return Column(*args, **kwargs)
+        # a copy into a subclass of an abstract model keeps the field class
+        return self.__class__(*args, **kwargs)
+
     # TODO: here and in all child classes: explore and add `params` and `unique_params`
     def params(self, *optionaldict, **kwargs):
         return super().params(*optionaldict, **kwargs)
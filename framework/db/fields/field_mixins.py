@@ -24,7 +24,9 @@ class FieldMixinMinMax(FieldExecutable):
     max_value: float = None
 
     def execute(self, *args, **kwargs):
-        value = kwargs.get("value", 0)
+        value = args[0] if args else kwargs.get("value", 0)
+        if value is None:
+            return value
         if getattr(self, "min_value", None) is not None:
             value = max(value, self.min_value)
         if getattr(self, "max_value", None) is not None:
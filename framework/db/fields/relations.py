@@ -6,7 +6,7 @@ from sqlalchemy.orm import RelationshipProperty
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 
 from ...lib import ExceptionFromFormattedDoc
-from ..models.utils import get_model_primary_key, PostInitCreator
+from ..models.utils import get_model_primary_key, PostInitCreator, ModelIndex
 from .base import FieldDefault
 
 
@@ -39,10 +39,17 @@ class AlreadyExistsError(ExceptionFromFormattedDoc):
 
 
 class FieldRelationshipColumn(FieldDefault, ABC):
+    """
+    A column that refers to another table. Such columns are used for
+    joins and lookups of related rows, so they are indexed by default
+    (pass `index=False` to opt out).
+    """
+
     def __init__(self, column_type, fk_name, **kwargs):
         self.column_type = column_type
         self.parent_column = ForeignKey(fk_name)
         kwargs.setdefault("nullable", False)
+        kwargs.setdefault("index", True)
 
         super().__init__(**kwargs)
 
@@ -111,6 +118,18 @@ class FieldRelationshipClass(ABC):
         fk_field_name = f"{parent_tablename}_{parent_pk_field.name}"
         return fk_column_type, fk_column_code, fk_field_name
 
+    @staticmethod
+    def get_relation_kwargs(model: DeclarativeMeta, name: str, kwargs: dict) -> dict:
+        """
+        Adds the loading strategy of the relationship from `Info.lazy` of
+        the model it belongs to, unless it is set in the field arguments.
+        """
+
+        lazy = model.Info.lazy.get(name, None)
+        if lazy is not None and "lazy" not in kwargs:
+            kwargs = {**kwargs, "lazy": lazy}
+        return kwargs
+
 
 # ======== FOREIGN KEY ========
 
@@ -137,6 +156,7 @@ class ForeignKeyField(FieldRelationshipClass):
             model,
             *,
             backref: str = None,
+            lazy: str = None,
             column_kwargs: dict = None,
             self_kwargs: dict = None,
             parent_kwargs: dict = None,
@@ -144,6 +164,8 @@ class ForeignKeyField(FieldRelationshipClass):
         column_kwargs = (column_kwargs is not None and column_kwargs) or dict()
         self_kwargs = (self_kwargs is not None and self_kwargs) or dict()
         parent_kwargs = (parent_kwargs is not None and parent_kwargs) or dict()
+        if lazy is not None:
+            self_kwargs.setdefault("lazy", lazy)
 
         self.model_to = model
         self.children_name = backref
@@ -179,14 +201,20 @@ class ForeignKeyField(FieldRelationshipClass):
                 parent_clsname,
                 attr.__repr__()
             )
-        parent_relation = self.relation_class(clsname, field_name, **self.parent_kwargs)
+        parent_kwargs = self.get_relation_kwargs(
+            self.model_to,
+            parent_fieldname,
+            self.parent_kwargs,
+        )
+        parent_relation = self.relation_class(clsname, field_name, **parent_kwargs)
         setattr(self.model_to, parent_fieldname, parent_relation)
 
         # set self relationship
+        self_kwargs = self.get_relation_kwargs(model_from, field_name, self.self_kwargs)
         self_relation = self.relation_class(
             parent_clsname,
             parent_fieldname,
-            **self.self_kwargs
+            **self_kwargs
         )
         setattr(model_from, field_name, self_relation)
 
@@ -258,15 +286,21 @@ class ManyToManyField(FieldRelationshipClass):
             model,
             *,
             backref: str = None,
+            lazy: str = None,
+            column_kwargs: dict = None,
             self_kwargs: dict = None,
             parent_kwargs: dict = None,
             through: DeclarativeMeta | type = None,
     ):
+        column_kwargs = (column_kwargs is not None and column_kwargs) or dict()
         self_kwargs = (self_kwargs is not None and self_kwargs) or dict()
         parent_kwargs = (parent_kwargs is not None and parent_kwargs) or dict()
+        if lazy is not None:
+            self_kwargs.setdefault("lazy", lazy)
 
         self.model_to = model
         self.children_name = backref
+        self.column_kwargs = column_kwargs
         self.self_kwargs = self_kwargs
         self.parent_kwargs = parent_kwargs
         self.through = through
@@ -290,10 +324,20 @@ class ManyToManyField(FieldRelationshipClass):
             self.get_model_pk_options(self.model_to),
         )
 
-        child_fk = ManyToManyColumn(child_type, child_fk_code)
-        parent_fk = ManyToManyColumn(parent_type, parent_fk_code)
-
-        Info = type("Info", (), {"tablename": tablename})
+        # the child column is the first one of the index on the pair,
+        # which serves its lookups too
+        child_kwargs = {**self.column_kwargs, "index": False}
+        child_fk = ManyToManyColumn(child_type, child_fk_code, **child_kwargs)
+        parent_fk = ManyToManyColumn(parent_type, parent_fk_code, **self.column_kwargs)
+
+        # each pair is linked once, which also lets `m2m_link` skip
+        # already existing links
+        pair_index = ModelIndex(child_fk_name, parent_fk_name, unique=True)
+        Info = type("Info", (), {
+            "tablename": tablename,
+            "indexes": [pair_index],
+            "natural_key": (child_fk_name, parent_fk_name),
+        })
         self.through = model.__class__(
             clsname,
             (model.__class__.base_model,),
@@ -305,17 +349,23 @@ class ManyToManyField(FieldRelationshipClass):
         )
 
     def set_fields(self, model: DeclarativeMeta, field_name: str):
+        self_kwargs = self.get_relation_kwargs(model, field_name, self.self_kwargs)
+        parent_kwargs = self.get_relation_kwargs(
+            self.model_to,
+            self.children_name,
+            self.parent_kwargs,
+        )
         child_rel = ManyToManyRelationship(
             self.model_to.__name__,
             self.through.__tablename__,
             self.children_name,
-            **self.self_kwargs
+            **self_kwargs
         )
         parent_rel = ManyToManyRelationship(
             model.__name__,
             self.through.__tablename__,
             field_name,
-            **self.parent_kwargs
+            **parent_kwargs
         )
         setattr(model, field_name, child_rel)
         setattr(self.model_to, self.children_name, parent_rel)
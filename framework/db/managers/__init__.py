@@ -1,9 +1,18 @@
 from .session import __all_for_module__ as __session_all__
 from .base import __all_for_module__ as __base_all__
+from .manager import __all_for_module__ as __manager_all__
+from .buffer import __all_for_module__ as __buffer_all__
 
 from .session import *
 from .base import *
+from .manager import *
+from .buffer import *
 
 
-__all_for_module__ = __session_all__ + __base_all__
+__all_for_module__ = (
+    __session_all__ +
+    __base_all__ +
+    __manager_all__ +
+    __buffer_all__
+)
 __all__ = __all_for_module__
@@ -1,8 +1,9 @@
 from types import NoneType
+from typing import Iterable
 
 from sqlalchemy.orm import DeclarativeMeta
 
-from ..utils.func import generate_pydantic_model
+from ..utils.func import generate_pydantic_model, validate_many, BatchValidation
 
 
 __all_for_module__ = ["BasePeel"]
@@ -10,8 +11,14 @@ __all__ = __all_for_module__ + ["BasePeelMeta"]
 
 
 class BasePeelMeta(type):
+    """
+    Metaclass of the peels. Peels do not have their own attributes other
+    than `model` (the slot of `BasePeel`), so `__slots__` are empty.
+    """
+
     def __new__(mcs, clsname, bases, dct):
         dct.setdefault("__abstract__", False)
+        dct.setdefault("__slots__", ())
         if dct["__abstract__"]:
             return super().__new__(mcs, clsname, bases, dct)
 
@@ -22,28 +29,77 @@ class BasePeelMeta(type):
             raise AttributeError("The model must be a descendant of BaseModel.")
 
         dct["__pydantic__"] = generate_pydantic_model(model_cls)
-        dct["_m_attr_list"] = [str(field.name) for field in model_cls.__table__.columns]
+        dct["_m_attrs"] = frozenset(
+            str(field.name) for field in model_cls.__table__.columns
+        )
 
         cls = super().__new__(mcs, clsname, bases, dct)
         return cls
 
 
 class BasePeel(metaclass=BasePeelMeta):
+    """
+    A wrapper around a model object that only allows to work with the
+    fields of the model.
+
+    The peel either creates a new model object or wraps an existing one
+    (for example, a query result), `wrap_many` wraps a whole list.
+    """
+
     __abstract__ = True
+    __slots__ = ("model",)
 
     Model: type = NoneType  # BaseModelMeta
-    model: object = None
-    _m_attr_list: list[str] = []
+    _m_attrs: frozenset[str] = frozenset()
     __pydantic__ = dict()
 
+    def __init__(self, model: object = None):
+        if model is None:
+            model = self.Model()
+        elif not isinstance(model, self.Model):
+            raise TypeError(
+                f"{type(model).__name__} is not a {self.Model.__name__} object")
+        super().__setattr__("model", model)
+
+    def __getattr__(self, key):
+        # only called if there is no such attribute in the peel itself
+        if key in self._m_attrs:
+            return getattr(self.model, key)
+        raise AttributeError(f"{self.Model.__name__} model has no {key} attribute")
+
     def __setattr__(self, key, value):
-        if self.model is None:
-            raise AttributeError("The model object is not initialized")
-        if key in self._m_attr_list:
+        if key in self._m_attrs:
             setattr(self.model, key, value)
         else:
             raise AttributeError(
                 f"{self.Model.__name__} model has no {key} attribute")
 
-    def __init__(self):
-        super().__setattr__("model", self.Model())
+    @classmethod
+    def wrap_many(cls, rows: Iterable) -> list:
+        """
+        Wraps the model objects (for example, query results) into peels.
+        Unlike `__init__`, the type of objects is not checked.
+        """
+
+        new = object.__new__
+        set_model = BasePeel.model.__set__
+        peels = []
+        for row in rows:
+            peel = new(cls)
+            set_model(peel, row)
+            peels.append(peel)
+        return peels
+
+    @classmethod
+    def schema(cls, variant: str = "read") -> type:
+        """`pydantic` schema of the model: `read`, `create` or `update`."""
+        return generate_pydantic_model(cls.Model, variant)
+
+    @classmethod
+    def validate_many(
+            cls,
+            rows: list[dict],
+            variant: str = "create",
+    ) -> BatchValidation:
+        """Validates all rows with one call, see `validate_many`."""
+        return validate_many(cls.Model, rows, variant)
@@ -0,0 +1,350 @@
+"""
+Write-behind buffer for counters that change too often to be written
+to the database one by one.
+
+>>> stats = WriteBehindBuffer(PersonModel, journal="person_stats.journal")
+>>> stats.start()
+>>> stats.add(person.id, experience=15, money=3)
+>>> stats.current(person, "money")  # the value with the unwritten delta
+"""
+
+import os
+import json
+import atexit
+import threading
+from typing import Any, Iterable
+
+from sqlalchemy import Integer, bindparam, update
+from sqlalchemy.engine import Engine
+
+from .session import DbEngine
+
+
+__all_for_module__ = ["WriteBehindBuffer"]
+__all__ = __all_for_module__
+
+
+class WriteBehindBuffer:
+    """
+    Collects the deltas of integer fields by rows in memory and writes
+    them to the database with one batched `UPDATE` (`executemany`): on a
+    timer (`start`), when `max_rows` rows are waiting, or at the exit of
+    the process. All deltas of the same row and field are summed, so a
+    hundred changes of a counter are written as one.
+
+    The buffer works in its own transactions on the engine, not in the
+    `db_session`, so it can be flushed from the timer thread. The deltas
+    are applied like in `increment`, with the bounds of the fields, but
+    to the sum of the deltas, not to each of them.
+
+    With a `journal` file each delta is also appended to it, and the
+    deltas left in the journal after a crash are loaded on creation of
+    the buffer. If the process crashes right after a commit of a flush,
+    the flushed deltas can be applied once more. The journal is synced
+    to the disk (`fsync`) once per `sync_every` deltas, on each tick of
+    the timer and by each flush: a crash of the process loses nothing,
+    a crash of the system loses the deltas since the last sync, up to
+    `sync_every` of them or `flush_interval` seconds of them. With
+    `sync_every=1` each delta is synced by `add`, which is much slower.
+
+    After a flush the loaded objects of the flushed rows are stale: the
+    flushed fields (and the version of `Info.versioned` models) are
+    expired in the session by `expire_flushed`. The session belongs to
+    the thread that created the buffer, so a flush in that thread does
+    it at once, and after the flushes of the timer it is done by
+    `current` or can be called before changing the objects.
+
+    An in-memory SQLite database is separate for each thread, so with it
+    the buffer can only be flushed manually.
+    """
+
+    def __init__(
+            self,
+            model,
+            flush_interval: float = 1.0,
+            max_rows: int = 1000,
+            journal: str = None,
+            sync_every: int = 100,
+            engine: Engine = DbEngine,
+    ):
+        self.model = model
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.engine = engine
+
+        # the fields that can be buffered, checked by each `add`
+        columns = model.__table__.columns
+        self.fields = frozenset(
+            column.key
+            for column in columns
+            if isinstance(column.type, Integer)
+            and not column.primary_key
+            # the version is incremented by the flush itself
+            and not (model.Info.versioned and column.key == "version")
+        )
+
+        self.pending: dict[Any, dict[str, int]] = dict()
+        self.flushing: dict[Any, dict[str, int]] = dict()  # being written
+        self.flushed: dict[Any, set[str]] = dict()  # written, not expired yet
+        self._owner = threading.current_thread()  # the thread of the session
+        self._lock = threading.Lock()  # `pending` and the journal
+        self._flush_lock = threading.Lock()  # only one flush at a time
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread = None
+
+        self.journal = journal
+        self.sync_every = sync_every
+        self.unsynced = 0  # deltas in the journal after the last sync
+        self._journal_file = None
+        if journal is not None:
+            self.recover()
+            self._journal_file = open(journal, "a", encoding="utf-8")
+
+    def __repr__(self):
+        return "{}(model={}, pending={})".format(
+            self.__class__.__name__,
+            self.model.__name__,
+            len(self.pending),
+        )
+
+    def __len__(self):
+        return len(self.pending)
+
+    # ======== DELTAS ========
+
+    def add(self, pk, **deltas: int):
+        """Adds the deltas of the fields of the row with this `pk`."""
+
+        if not self.fields.issuperset(deltas):
+            self.check_fields(deltas)
+
+        with self._lock:
+            self.merge(pk, deltas)
+            if self._journal_file is not None:
+                self.write_journal([(pk, deltas)])
+            is_full = len(self.pending) >= self.max_rows
+
+        if is_full:
+            self.flush()
+
+    def check_fields(self, names: Iterable[str]):
+        columns = self.model.__table__.columns
+        for name in names:
+            if name in self.fields:
+                continue
+            if name not in columns:
+                raise AttributeError(
+                    f"<{name}> of {self.model.__name__} is not a field")
+            raise TypeError(f"Only integer fields can be buffered, not <{name}>")
+
+    def merge(self, pk, deltas: dict[str, int]):
+        row = self.pending.setdefault(pk, dict())
+        for (name, delta) in deltas.items():
+            row[name] = row.get(name, 0) + delta
+
+    def get_delta(self, pk, field: str) -> int:
+        with self._lock:
+            return (
+                self.pending.get(pk, dict()).get(field, 0)
+                + self.flushing.get(pk, dict()).get(field, 0)
+            )
+
+    def current(self, instance, field: str) -> Any:
+        """
+        Read-your-writes: the value of the field of the object together
+        with the delta that is not written to the database yet.
+        """
+
+        self.expire_flushed()
+        value = getattr(instance, field)
+        delta = self.get_delta(getattr(instance, self.model.objects.pk.key), field)
+        if not delta or value is None:
+            return value
+
+        value += delta
+        column = self.model.__table__.columns[field]
+        min_value = getattr(column, "min_value", None)
+        max_value = getattr(column, "max_value", None)
+        if min_value is not None:
+            value = max(value, min_value)
+        if max_value is not None:
+            value = min(value, max_value)
+        return value
+
+    # ======== FLUSH ========
+
+    def flush(self) -> int:
+        """
+        Writes all the waiting deltas in one transaction. If it fails,
+        the deltas are returned to the buffer and the error is raised.
+        Returns the number of rows.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                (pending, self.pending) = (self.pending, dict())
+                self.flushing = pending
+            if not pending:
+                return 0
+
+            try:
+                with self.engine.begin() as conn:
+                    for (statement, params) in self.get_statements(pending):
+                        conn.execute(statement, params)
+            except BaseException:
+                with self._lock:
+                    self.flushing = dict()
+                    for (pk, deltas) in pending.items():
+                        self.merge(pk, deltas)
+                raise
+
+            with self._lock:
+                self.flushing = dict()
+                for (pk, deltas) in pending.items():
+                    self.flushed.setdefault(pk, set()).update(deltas)
+                if self._journal_file is not None:
+                    self.rewrite_journal()
+
+        if threading.current_thread() is self._owner:
+            self.expire_flushed()
+        return len(pending)
+
+    def expire_flushed(self):
+        """
+        Expires the flushed fields of the loaded objects, so they are read
+        again with the written deltas. Must be called in the thread of the
+        session, the one that created the buffer.
+        """
+
+        with self._lock:
+            (flushed, self.flushed) = (self.flushed, dict())
+        if not flushed:
+            return
+
+        manager = self.model.objects
+        # the flush has also increased the version of the rows
+        extra = ["version"] if self.model.Info.versioned else []
+        for (pk, fields) in flushed.items():
+            manager.expire_fields([pk], sorted(fields) + extra)
+
+    def get_statements(self, pending: dict) -> list[tuple[Any, list[dict]]]:
+        """
+        `UPDATE` statements with their parameters: the rows are grouped
+        by the set of changed fields, one `executemany` for each group.
+        """
+
+        groups: dict[tuple[str, ...], list[dict]] = dict()
+        for (pk, deltas) in pending.items():
+            fields = tuple(sorted(name for (name, delta) in deltas.items() if delta))
+            if not fields:
+                continue
+            params = {f"d_{name}": deltas[name] for name in fields}
+            params["pk_value"] = pk
+            groups.setdefault(fields, []).append(params)
+
+        manager = self.model.objects
+        statements = []
+        for (fields, params) in groups.items():
+            values = manager.increment_values({
+                name: bindparam(f"d_{name}")
+                for name in fields
+            })
+            statement = (
+                update(self.model.__table__)
+                .where(manager.pk == bindparam("pk_value"))
+                .values(values)
+            )
+            statements.append((statement, params))
+        return statements
+
+    # ======== TIMER ========
+
+    def start(self):
+        """Starts flushing in a background thread and at the exit."""
+
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self.run,
+            name=f"write-behind-{self.model.__tablename__}",
+            daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            # before the flush, which can fail and keep the deltas
+            self.sync_journal()
+            try:
+                self.flush()
+            except Exception:
+                # the deltas are back in the buffer, the next flush retries
+                continue
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        atexit.unregister(self.close)
+
+    def close(self):
+        """Stops the timer and writes everything that is left."""
+
+        self.stop()
+        self.flush()
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
+    # ======== JOURNAL ========
+
+    def write_journal(self, rows: list[tuple[Any, dict]]):
+        for (pk, deltas) in rows:
+            self._journal_file.write(json.dumps([pk, deltas]) + "\n")
+        # to the system, where it survives a crash of the process
+        self._journal_file.flush()
+        self.unsynced += len(rows)
+        if self.unsynced >= self.sync_every:
+            os.fsync(self._journal_file.fileno())
+            self.unsynced = 0
+
+    def sync_journal(self):
+        """Syncs the deltas written to the journal to the disk."""
+
+        with self._lock:
+            if self._journal_file is None or not self.unsynced:
+                return
+            os.fsync(self._journal_file.fileno())
+            self.unsynced = 0
+
+    def rewrite_journal(self):
+        """Leaves only the deltas that are still waiting in the journal."""
+
+        self._journal_file.close()
+        temp_path = self.journal + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for (pk, deltas) in self.pending.items():
+                file.write(json.dumps([pk, deltas]) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.journal)
+        self.unsynced = 0
+        self._journal_file = open(self.journal, "a", encoding="utf-8")
+
+    def recover(self):
+        """Loads the deltas that were not flushed before the last exit."""
+
+        if not os.path.exists(self.journal):
+            return
+        with open(self.journal, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    (pk, deltas) = json.loads(line)
+                except ValueError:
+                    # the last line can be cut off by the crash
+                    continue
+                self.merge(pk, deltas)
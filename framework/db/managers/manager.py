@@ -0,0 +1,557 @@
+"""
+Model managers - the part of the model that works with sets of rows,
+not with a single object.
+
+Each model class gets its own manager object as `Model.objects`, the
+manager class can be changed in the `Info.manager` of the model.
+"""
+
+import json
+import base64
+from datetime import date, datetime, time
+from itertools import groupby
+from typing import Any, Iterable, Iterator, Sequence
+
+from sqlalchemy import and_, or_, case, insert, select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import (
+    Query,
+    Session,
+    load_only,
+    undefer_group,
+    joinedload,
+    selectinload,
+    subqueryload,
+    immediateload,
+    lazyload,
+    noload,
+    raiseload,
+)
+from sqlalchemy.orm.relationships import RelationshipProperty
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql.schema import Column, Table
+from sqlalchemy.sql.sqltypes import Integer
+
+from ...lib import ExceptionFromFormattedDoc
+from ...lib.func import chunked
+from ..models.hooks import run_flush_hooks
+from ..utils.func import validate_many, BatchValidation
+from .session import db_session
+
+
+__all_for_module__ = ["BaseManager"]
+__all__ = __all_for_module__ + ["Page", "InvalidCursorError"]
+
+
+class InvalidCursorError(ExceptionFromFormattedDoc):
+    """Cursor <{}> is invalid for ordering by <{}>"""
+
+
+LOADERS = {
+    "joined": joinedload,
+    "selectin": selectinload,
+    "subquery": subqueryload,
+    "immediate": immediateload,
+    "select": lazyload,
+    "noload": noload,
+    "raise": raiseload,
+}
+
+
+class Page:
+    """
+    One page of keyset pagination: rows of the page and the cursor for
+    the next one (`None` if this page is the last).
+    """
+
+    def __init__(self, rows: list, next_cursor: str | None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"Page(rows={len(self.rows)}, next_cursor={self.next_cursor!r})"
+
+
+class BaseManager:
+    """
+    Standard model manager.
+
+    Does not store any state other than the model class, all requests
+    go through the current `db_session`.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(model={self.model.__name__})"
+
+    @property
+    def session(self) -> Session:
+        return db_session.session
+
+    @property
+    def pk(self) -> Column:
+        return self.model.__table__.primary_key.columns[0]
+
+    def query(
+            self,
+            profile: str = None,
+            undefer: Iterable[str] = (),
+            load: dict[str, str] = None,
+    ) -> Query:
+        """
+        Query of the model objects.
+
+        `profile` is a name from `Info.load_only`: only the fields of the
+        profile (and the primary key) are loaded, the rest are loaded on
+        access. `undefer` are the groups from `Info.deferred` that are
+        loaded right away, in the same query.
+
+        `load` overrides the loading strategies of the relationships for
+        this query (`{relationship: strategy}`, the strategies are the
+        same as for `lazy=`).
+
+        >>> UserModel.objects.query(undefer=["secrets"])
+        >>> ItemModel.objects.query(profile="listing", load={"shops": "noload"})
+        """
+
+        query = self.session.query(self.model)
+        options = [undefer_group(group) for group in undefer]
+        for (name, strategy) in (load or dict()).items():
+            if strategy not in LOADERS:
+                raise ValueError(f"Unknown loading strategy <{strategy}>")
+            options.append(LOADERS[strategy](getattr(self.model, name)))
+        if profile is not None:
+            profiles = self.model.Info.load_only
+            if profile not in profiles:
+                raise ValueError(
+                    f"Unknown load profile <{profile}> of {self.model.__name__}")
+            fields = [getattr(self.model, name) for name in profiles[profile]]
+            options.append(load_only(*fields))
+        if options:
+            query = query.options(*options)
+        return query
+
+    # ======== PAGINATION ========
+
+    def paginate(
+            self,
+            order_by: str = None,
+            cursor: str = None,
+            limit: int = 50,
+            descending: bool = False,
+            query: Query = None,
+    ) -> Page:
+        """
+        Keyset (seek) pagination: instead of `OFFSET` the page continues
+        right after the last row of the previous page, so every page
+        costs the same, no matter how far it is from the beginning.
+
+        Rows are ordered by the `order_by` column and then by the primary
+        key, so the column does not have to be unique. It should be
+        indexed and not nullable, otherwise each page is a full scan.
+
+        >>> page = PersonModel.objects.paginate("rating", descending=True)
+        >>> next_page = PersonModel.objects.paginate(
+        >>>     "rating", page.next_cursor, descending=True)
+        """
+
+        pk = self.pk
+        column = self.model.__table__.columns[order_by or pk.key]
+        if query is None:
+            query = self.query()
+
+        if cursor is not None:
+            (value, pk_value) = self.decode_cursor(cursor, column, descending)
+            if descending:
+                query = query.filter(or_(
+                    column < value,
+                    and_(column == value, pk < pk_value),
+                ))
+            else:
+                query = query.filter(or_(
+                    column > value,
+                    and_(column == value, pk > pk_value),
+                ))
+
+        if descending:
+            query = query.order_by(column.desc(), pk.desc())
+        else:
+            query = query.order_by(column.asc(), pk.asc())
+
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(
+                column,
+                getattr(last, column.key),
+                getattr(last, pk.key),
+                descending,
+            )
+        return Page(rows, next_cursor)
+
+    @staticmethod
+    def encode_cursor(
+            column: Column,
+            value: Any,
+            pk_value: Any,
+            descending: bool,
+    ) -> str:
+        """
+        Packs the position of the last row into an opaque string. The
+        cursor remembers the column and direction it was made for.
+        """
+
+        if isinstance(value, (datetime, date, time)):
+            value = value.isoformat()
+        data = {"c": column.key, "d": descending, "v": [value, pk_value]}
+        raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(
+            cursor: str,
+            column: Column,
+            descending: bool,
+    ) -> tuple[Any, Any]:
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            (value, pk_value) = data["v"]
+            is_correct = data["c"] == column.key and data["d"] == descending
+        except (ValueError, TypeError, KeyError):
+            is_correct = False
+        if not is_correct:
+            raise InvalidCursorError(cursor, column.key)
+
+        python_type = column.type.python_type
+        if value is not None and python_type in (datetime, date, time):
+            value = python_type.fromisoformat(value)
+        return value, pk_value
+
+    # ======== STREAMING ========
+
+    def stream(self, batch_size: int = 1000, query: Query = None) -> Iterator:
+        """
+        Iterates over all rows of the query, loading them from the
+        database in batches of `batch_size`. Where the driver supports
+        server-side cursors, they are used, so memory does not depend on
+        the size of the table.
+
+        Objects are not kept by the session after iteration, unless they
+        have been changed.
+        """
+
+        if query is None:
+            query = self.query()
+        query = query.execution_options(stream_results=True)
+        return iter(query.yield_per(batch_size))
+
+    # ======== READ-ONLY RECORDS ========
+
+    def records_select(self, *criteria, order_by=None, limit: int = None):
+        """`SELECT` of all the columns of the table in their order."""
+
+        table = self.model.__table__
+        statement = select(*table.columns).where(*criteria)
+        if order_by is not None:
+            statement = statement.order_by(order_by)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
+
+    def records(self, *criteria, order_by=None, limit: int = None) -> list:
+        """
+        Read-only mode: returns rows as `Model.__record__` tuples instead
+        of model objects. Records are not tracked by the session, have no
+        instrumented state and cannot be changed, so they are much
+        lighter and faster to load.
+
+        >>> ItemModel.objects.records(ItemModel.min_level <= 5, limit=10)
+        >>> # [ItemModelRecord(item_type_id=1, name='dagger', ...), ...]
+        """
+
+        statement = self.records_select(*criteria, order_by=order_by, limit=limit)
+        make = self.model.__record__._make
+        return list(map(make, self.session.execute(statement)))
+
+    def stream_records(self, *criteria, batch_size: int = 1000) -> Iterator:
+        """`records` with streaming, see `stream`."""
+
+        statement = self.records_select(*criteria)
+        result = self.session.execute(
+            statement,
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        make = self.model.__record__._make
+        for partition in result.partitions(batch_size):
+            yield from map(make, partition)
+
+    # ======== BULK ========
+
+    def validate_many(
+            self,
+            rows: Sequence[dict],
+            variant: str = "create",
+    ) -> BatchValidation:
+        """
+        Validates the list of rows with the `pydantic` schema of the model
+        in one call, see `validate_many`. Valid rows can be passed to
+        `bulk_insert` as they are.
+        """
+        return validate_many(self.model, rows, variant)
+
+    def bulk_insert(self, rows: Iterable[dict], chunk_size: int = 1000) -> int:
+        """
+        Inserts the rows with `executemany`, bypassing the unit of work
+        and the identity map. Each row still goes through the model:
+        executable fields, presetters and presave actions are applied,
+        but the objects are not added to the session.
+
+        The rows are inserted in their order. The changes are not
+        committed. Returns the number of rows.
+        """
+
+        table = self.model.__table__
+        statement = insert(table)
+        attr_to_column = [
+            (prop.key, prop.columns[0].key)
+            for prop in self.model.__mapper__.column_attrs
+        ]
+
+        count = 0
+        for chunk in chunked(rows, chunk_size):
+            instances = [self.model(**row) for row in chunk]
+            run_flush_hooks(instances)
+
+            rows_values = []
+            for instance in instances:
+                state = instance.__dict__
+                rows_values.append({
+                    column: state[attr]
+                    for (attr, column) in attr_to_column
+                    if attr in state
+                })
+
+            # `executemany` needs the same keys in every row (rows without
+            # some fields get the defaults of the columns), so a new one is
+            # started when the keys change; the rows keep their order, and
+            # the autoincrement ids follow it
+            for (_, params) in groupby(rows_values, key=tuple):
+                self.session.execute(statement, list(params))
+            count += len(instances)
+
+        return count
+
+    # ======== COUNTERS ========
+
+    def increment_values(self, deltas: dict[str, Any]) -> dict[Column, Any]:
+        """
+        `SET` values for `increment`: `column + delta`, clamped in SQL by
+        the `min_value`/`max_value` of the field. Deltas can be values or
+        bind parameters.
+        """
+
+        columns = self.model.__table__.columns
+        values = dict()
+        for (name, delta) in deltas.items():
+            column = columns.get(name, None)
+            if column is None:
+                raise AttributeError(
+                    f"<{name}> of {self.model.__name__} is not a field")
+            if not isinstance(column.type, Integer) or column.primary_key:
+                raise TypeError(f"Only integer fields can be incremented, not <{name}>")
+
+            value = column + delta
+            min_value = getattr(column, "min_value", None)
+            max_value = getattr(column, "max_value", None)
+            if min_value is not None:
+                value = case((value < min_value, min_value), else_=value)
+            if max_value is not None:
+                value = case((value > max_value, max_value), else_=value)
+            values[column] = value
+
+        # the change of the row must be visible to the optimistic checks
+        if self.model.Info.versioned:
+            values[columns.version] = columns.version + 1
+
+        return values
+
+    def increment(self, ids: Iterable, **deltas) -> int:
+        """
+        Atomically adds the deltas to the fields of the rows with one
+        `UPDATE ... SET x = x + :delta`, without reading the rows. The
+        bounds of the fields (`PositiveIntegerField` and others with
+        `FieldMixinMinMax`) are applied in the same statement. The
+        version of `Info.versioned` models is incremented too.
+
+        The changes are not committed. The changed fields of the objects
+        in the session are expired. Returns the number of rows.
+
+        >>> PersonModel.increment([1, 2], money=-50, fights_count=1)
+        """
+
+        ids = list(ids)
+        if not ids or not deltas:
+            return 0
+
+        pk = self.pk
+        statement = (
+            update(self.model.__table__)
+            .where(pk.in_(ids))
+            .values(self.increment_values(deltas))
+        )
+        count = self.session.execute(statement).rowcount
+        fields = list(deltas)
+        if self.model.Info.versioned:
+            fields.append("version")
+        self.expire_fields(ids, fields)
+        return count
+
+    def expire_fields(self, ids: Iterable, fields: Iterable[str]):
+        """Expires the fields of the objects with these ids in the session."""
+
+        fields = list(fields)
+        identity_map = self.session.identity_map
+        for pk in ids:
+            instance = identity_map.get(identity_key(self.model, pk))
+            if instance is not None:
+                self.session.expire(instance, fields)
+
+    # ======== MANY TO MANY ========
+
+    def get_m2m_relation(self, field: str) -> tuple[RelationshipProperty, Table]:
+        """The many-to-many relationship of the model and its through table."""
+
+        relation = self.model.__mapper__.relationships.get(field, None)
+        if relation is None or relation.secondary is None:
+            raise AttributeError(
+                f"<{field}> of {self.model.__name__} is not a many-to-many field")
+
+        related_tablename = relation.mapper.class_.__tablename__
+        through = self.model.Info.m2m_models.get(related_tablename, None)
+        table = through.__table__ if through is not None else relation.secondary
+        return relation, table
+
+    def m2m_link(
+            self,
+            field: str,
+            pairs: Iterable[tuple[Any, Any]],
+            ignore_conflicts: bool = False,
+            chunk_size: int = 1000,
+    ) -> int:
+        """
+        Links objects through the many-to-many `field` with `INSERT`s
+        into the through table, without loading the collections.
+
+        `pairs` are `(pk of this model, pk of the related model)`. With
+        `ignore_conflicts` the pairs that are already linked are skipped
+        (the through table must have a unique index on the pair, the
+        generated ones have it). A custom through model with other
+        required columns cannot be linked this way, its objects must be
+        created instead.
+
+        The changes are not committed. The linked collections of the
+        objects in the session are expired. Returns the number of rows.
+
+        >>> ItemModel.m2m_link("shops", [(item.id, shop.id) for shop in shops])
+        """
+
+        (relation, table) = self.get_m2m_relation(field)
+        (self_column, other_column) = self.get_m2m_columns(relation)
+        required = [
+            column.key
+            for column in table.columns
+            if column is not self_column and column is not other_column
+            and not column.nullable
+            and column.default is None and column.server_default is None
+            and column is not table._autoincrement_column
+        ]
+        if required:
+            raise ValueError(
+                f"<{field}> of {self.model.__name__} links through <{table.name}>"
+                f" with the required columns {required}, create its objects"
+            )
+
+        statement = insert(table)
+        if ignore_conflicts:
+            statement = self.ignore_conflicts(statement, table)
+
+        count = 0
+        for chunk in chunked(pairs, chunk_size):
+            params = [
+                {self_column.key: self_pk, other_column.key: other_pk}
+                for (self_pk, other_pk) in chunk
+            ]
+            result = self.session.execute(statement, params)
+            count += max(result.rowcount, 0)
+            self.expire_m2m(relation, chunk)
+
+        return count
+
+    def m2m_unlink(
+            self,
+            field: str,
+            pairs: Iterable[tuple[Any, Any]],
+            chunk_size: int = 1000,
+    ) -> int:
+        """
+        Unlinks the pairs, see `m2m_link`. Returns the number of deleted
+        rows.
+        """
+
+        (relation, table) = self.get_m2m_relation(field)
+        (self_column, other_column) = self.get_m2m_columns(relation)
+        pair_columns = tuple_(self_column, other_column)
+
+        count = 0
+        for chunk in chunked(pairs, chunk_size):
+            statement = delete(table).where(pair_columns.in_(chunk))
+            count += self.session.execute(statement).rowcount
+            self.expire_m2m(relation, chunk)
+
+        return count
+
+    @staticmethod
+    def get_m2m_columns(relation: RelationshipProperty) -> tuple[Column, Column]:
+        """Columns of the through table for this and for the related model."""
+
+        ((_, self_column),) = relation.synchronize_pairs
+        ((_, other_column),) = relation.secondary_synchronize_pairs
+        return self_column, other_column
+
+    def ignore_conflicts(self, statement, table: Table):
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            return statement.prefix_with("OR IGNORE")
+        if dialect == "mysql":
+            return statement.prefix_with("IGNORE")
+        if dialect == "postgresql":
+            return postgresql_insert(table).on_conflict_do_nothing()
+        raise ValueError(f"Conflict ignoring is not supported for <{dialect}>")
+
+    def expire_m2m(self, relation: RelationshipProperty, pairs: list[tuple]):
+        """
+        Expires the collections of the objects in the session, so that
+        they are loaded again with the new links.
+        """
+
+        identity_map = self.session.identity_map
+        related = relation.mapper.class_
+        for (self_pk, other_pk) in pairs:
+            instance = identity_map.get(identity_key(self.model, self_pk))
+            if instance is not None:
+                self.session.expire(instance, [relation.key])
+            if relation.back_populates is None:
+                continue
+            instance = identity_map.get(identity_key(related, other_pk))
+            if instance is not None:
+                self.session.expire(instance, [relation.back_populates])
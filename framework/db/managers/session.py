@@ -1,5 +1,9 @@
+from functools import wraps
+from typing import Callable
+
 from sqlalchemy.engine import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
 
 from ...lib import Singleton
 from ...settings import settings
@@ -9,6 +13,7 @@ __all_for_module__ = [
     "DbEngine",
     "DbSession",
     "db_session",
+    "retry_on_stale",
 ]
 __all__ = __all_for_module__ + [
     "DbSessionCreator",
@@ -30,5 +35,41 @@ class DbSession(Singleton):
     def commit(self):
         self.session.commit()
 
+    def rollback(self):
+        self.session.rollback()
+
 
 db_session = DbSession()
+
+
+def retry_on_stale(attempts: int = 3) -> Callable:
+    """
+    Decorator for a unit of work with `Info.versioned` models: calls the
+    function and commits the session. If some of the changed rows have
+    been changed by someone else in the meantime (`StaleDataError`), the
+    session is rolled back, so all objects are loaded again, and the
+    function is called once more, up to `attempts` times.
+
+    The function must read everything it changes inside itself.
+
+    >>> @retry_on_stale()
+    >>> def buy(person_id: int, price: int):
+    >>>     person = db_session.session.get(PersonModel, person_id)
+    >>>     person.money -= price
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    result = function(*args, **kwargs)
+                    db_session.commit()
+                    return result
+                except StaleDataError:
+                    db_session.rollback()
+                    if attempt == attempts:
+                        raise
+        return wrapper
+
+    return decorator
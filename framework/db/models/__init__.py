@@ -1,9 +1,11 @@
 from .base import __all_for_module__ as __base_all__
+from .hooks import __all_for_module__ as __hooks_all__
 from .utils import __all_for_module__ as __utils_all__
 
 from .base import *
+from .hooks import *
 from .utils import *
 
 
-__all_for_module__ = __base_all__ + __utils_all__
+__all_for_module__ = __base_all__ + __hooks_all__ + __utils_all__
 __all__ = __all_for_module__
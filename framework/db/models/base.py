@@ -3,19 +3,28 @@ File with the model for inheritance in other database models. Also here
 is the metaclass that generates the models.
 """
 
+from collections import namedtuple
 from typing import Callable, Any
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import deferred
+from sqlalchemy.orm.attributes import InstrumentedAttribute
 from sqlalchemy.orm.decl_api import DeclarativeMeta
+from sqlalchemy.sql.schema import Column
 from sqlalchemy.sql.sqltypes import Integer
 
 from ...lib import camel_to_snake
 from ...settings import settings
 
-from ..fields import FieldExecutable, FieldRelationshipClass, IdField
+from ..fields import FieldExecutable, FieldRelationshipClass, IdField, IntegerField
 from .utils import (
     attribute_presetter,
+    presave_action,
     droppable_attribute,
+    generate_model_init,
     get_model_primary_key,
+    ModelIndex,
+    presetted_value,
 )
 
 
@@ -41,7 +50,14 @@ class DefaultInfo:
     tablename: str = None
     default_pk: bool = True
     m2m_models: dict[str, type] = dict()
-    manager: type = None
+    manager: type = None  # `BaseManager` by default
+    indexes: list[str | tuple[str, ...] | ModelIndex] = []
+    # columns loaded only on access, a list or `{group: [fields]}`
+    deferred: list[str] | dict[str, list[str]] = []
+    load_only: dict[str, list[str]] = dict()  # {profile: [fields]}
+    lazy: dict[str, str] = dict()  # {relationship: loading strategy}
+    versioned: bool = False  # optimistic concurrency by the `version` column
+    natural_key: str | tuple[str, ...] = None  # fixture sync key, pk by default
 
 
 class BaseModelMeta(DeclarativeMeta):
@@ -49,13 +65,20 @@ class BaseModelMeta(DeclarativeMeta):
     The main metaclass for generating database models.
 
     - set `__tablename__
+    - adds `version` column for `Info.versioned`
     - injects standard info data from `DefaultInfo`
     - injects standard data from `DefaultBaseModelFunctionality`
-    - set `__presetters__` for attributes
+    - set `__presetters__` for attributes and binds them to the fields
+    - set `__presave_actions__`
     - drop `droppable_attribute`s
     - creates a `__pydantic__` model
     - translates `relationship fields` to `SQLAlchemy fields`
+    - generates `__init__` for the executable fields
+    - makes `Info.deferred` columns deferred
     - executes `_postinit_actions`
+    - creates indexes from `Info.indexes`
+    - creates `__record__` class for read-only rows
+    - set `objects` manager
     """
 
     base_model = None
@@ -65,11 +88,11 @@ class BaseModelMeta(DeclarativeMeta):
         cls.postinit_functionality(cls, dct)
 
     def __new__(mcs, clsname, bases, dct):
-        mcs.precreate_functionality(dct, clsname)
+        mcs.precreate_functionality(dct, clsname, bases)
         return super().__new__(mcs, clsname, bases, dct)
 
     @classmethod
-    def precreate_functionality(mcs, dct: dict, clsname: str):
+    def precreate_functionality(mcs, dct: dict, clsname: str, bases: tuple):
         """
         The main method of the class. Executes all necessary logic on
         the new model class.
@@ -78,9 +101,13 @@ class BaseModelMeta(DeclarativeMeta):
         mcs.set_changeable_clsattr(dct)
         mcs.add_info(dct)
         mcs.set_default_arguments(dct, clsname)
+        mcs.set_version_field(dct)
         mcs.set_relation_fields(clsname, dct)
         mcs.create_presetters_by_decorator(dct)
+        mcs.create_presave_actions_by_decorator(dct)
         mcs.drop_droppable_by_decorator(dct)
+        mcs.set_init(dct, clsname, bases)
+        mcs.set_deferred_columns(dct)
 
     @classmethod
     def postinit_functionality(mcs, cls, dct: dict):
@@ -93,6 +120,12 @@ class BaseModelMeta(DeclarativeMeta):
             action(cls)
         del cls._postinit_actions
 
+        if hasattr(cls, "__table__"):
+            cls.set_presetters(cls)
+            cls.set_indexes(cls)
+            cls.set_record_class(cls)
+            cls.set_manager(cls)
+
     @classmethod
     def set_changeable_clsattr(mcs, dct: dict):
         dct.setdefault("_postinit_actions", [])
@@ -136,6 +169,25 @@ class BaseModelMeta(DeclarativeMeta):
         if dct["__abstract__"]:
             dct.pop("id", None)
 
+    @staticmethod
+    def set_version_field(dct: dict):
+        """
+        For `Info.versioned` models adds the `version` column, which is
+        checked in the `WHERE` of each `UPDATE` and `DELETE` of an object
+        and incremented by them. If the row has been changed since it was
+        loaded, the flush raises `StaleDataError`, see `retry_on_stale`.
+        """
+
+        if not dct["Info"].versioned or dct["__abstract__"]:
+            return
+
+        # the default is for inserts that bypass the mapper (`bulk_insert`)
+        version = IntegerField(default=1, nullable=False)
+        dct["version"] = version
+        mapper_args = dict(dct.get("__mapper_args__", dict()))
+        mapper_args["version_id_col"] = version
+        dct["__mapper_args__"] = mapper_args
+
     @staticmethod
     def set_relation_fields(clsname: str, dct: dict):
         columns = tuple(
@@ -148,6 +200,77 @@ class BaseModelMeta(DeclarativeMeta):
             field: FieldRelationshipClass
             field.generate_fields(clsname, name, dct)
 
+    @classmethod
+    def set_init(mcs, dct: dict, clsname: str, bases: tuple):
+        """
+        Collects the executable fields of the model once, at class
+        creation, and generates an `__init__` that handles exactly these
+        fields, without looking through all the columns of the table for
+        each new object.
+        """
+
+        executable_fields = dict()
+        for base in reversed(bases):
+            for field_data in getattr(base, "__executable_fields__", ()):
+                executable_fields[field_data[0]] = field_data
+        for (name, field) in dct.items():
+            if isinstance(field, FieldExecutable):
+                executable_fields[name] = (name, field, field.need_argument)
+
+        executable_fields = tuple(executable_fields.values())
+        dct["__executable_fields__"] = executable_fields
+
+        if mcs.base_model is None or "__init__" in dct:
+            return
+        if mcs.has_custom_init(bases):
+            # the inherited `__init__` ends in `BaseModel.__init__`, which
+            # executes the fields by `__executable_fields__`
+            return
+        if executable_fields:
+            init = generate_model_init(executable_fields, ModelWorker.__init__)
+            init.__qualname__ = f"{clsname}.__init__"
+        else:
+            init = ModelWorker.__init__
+        dct["__init__"] = init
+
+    @classmethod
+    def has_custom_init(mcs, bases: tuple) -> bool:
+        """Whether a base below `BaseModel` has its own `__init__`."""
+
+        for base in bases:
+            for klass in base.__mro__:
+                if klass is mcs.base_model or klass is object:
+                    break
+                init = vars(klass).get("__init__", None)
+                if init is None or init is ModelWorker.__init__:
+                    continue
+                if not getattr(init, "__generated__", False):
+                    return True
+        return False
+
+    @staticmethod
+    def set_deferred_columns(dct: dict):
+        """
+        Wraps the columns from `Info.deferred` into deferred properties:
+        they are not loaded with the object, but on the first access.
+
+        The columns of one group are loaded together in one query, the
+        columns from the list form are in the `"deferred"` group.
+        """
+
+        deferred_info = dct["Info"].deferred
+        if not isinstance(deferred_info, dict):
+            deferred_info = {"deferred": deferred_info}
+
+        for (group, fields) in deferred_info.items():
+            for name in fields:
+                if not isinstance(dct.get(name, None), Column):
+                    raise AttributeError(
+                        f"Only a column of the model can be deferred, <{name}>"
+                        f" of {dct['__qualname__']} is not a column"
+                    )
+                dct[name] = deferred(dct[name], group=group)
+
     @staticmethod
     def set_sqlite_arguments(cls):
         pk = get_model_primary_key(cls)
@@ -158,16 +281,85 @@ class BaseModelMeta(DeclarativeMeta):
             sqlite_dict = {"autoincrement": True, "with_rowid": True}
             cls.__table__.dialect_options["sqlite"] = sqlite_dict
 
+    @staticmethod
+    def set_indexes(cls):
+        # after `_postinit_actions`, because relation columns are only
+        # created there
+        for index in cls.Info.indexes:
+            ModelIndex.from_info(index).create(cls)
+
+    @staticmethod
+    def set_record_class(cls):
+        """
+        Creates an immutable tuple-based class with the columns of the
+        table, in which the rows are returned in the read-only mode.
+
+        Columns, whose keys cannot be names of the tuple fields (keywords
+        or names with a leading underscore), are only available by their
+        positions (`_3`).
+        """
+
+        fields = [str(column.key) for column in cls.__table__.columns]
+        cls.__record__ = namedtuple(f"{cls.__name__}Record", fields, rename=True)
+
+    @staticmethod
+    def set_manager(cls):
+        # managers use the session, which imports models through the
+        # fixtures, so the import cannot be at the top of the file
+        from ..managers.manager import BaseManager
+
+        manager_class = cls.Info.manager or BaseManager
+        cls.objects = manager_class(cls)
+
     @staticmethod
     def create_presetters_by_decorator(dct: dict[str, Any]):
         presetters = dict()
         for field_name in list(dct.keys()):
             if type(dct[field_name]) == attribute_presetter:
                 presetter: attribute_presetter = dct.pop(field_name)
-                presetters[presetter.to_attr] = presetter.call
+                presetters[presetter.to_attr] = presetter
 
         dct["__presetters__"] = presetters
 
+    @staticmethod
+    def create_presave_actions_by_decorator(dct: dict[str, Any]):
+        actions = dct.setdefault("__presave_actions__", [])
+        for field_name in list(dct.keys()):
+            if type(dct[field_name]) == presave_action:
+                action: presave_action = dct[field_name]
+                dct[field_name] = classmethod(action.call)
+                actions.append(field_name)
+
+    @staticmethod
+    def set_presetters(cls):
+        """
+        Binds each presetter to the `set` event of its instrumented
+        attribute, so only the attributes with a presetter pay for it.
+
+        Deferred presetters only remember that the attribute is waiting
+        for them, they are executed by the `before_flush` hook.
+        """
+
+        for (attr, presetter) in cls.__presetters__.items():
+            attribute = getattr(cls, attr, None)
+            if not isinstance(attribute, InstrumentedAttribute):
+                raise AttributeError(
+                    f"Presetter can only be set to a model field, <{attr}>"
+                    f" of {cls.__name__} is not a field"
+                )
+
+            if presetter.deferred:
+                def set_value(target, value, oldvalue, initiator, attr=attr):
+                    if isinstance(value, presetted_value):
+                        return value.value
+                    target.__dict__.setdefault("_deferred_presetters", set()).add(attr)
+                    return value
+            else:
+                def set_value(target, value, oldvalue, initiator, call=presetter.call):
+                    return call(target, value)
+
+            event.listen(attribute, "set", set_value, retval=True)
+
     @staticmethod
     def drop_droppable_by_decorator(dct: dict[str, Any]):
         for field_name in list(dct.keys()):
@@ -188,30 +380,53 @@ class BaseModel(ModelWorker):
     __abstract__ = True
     _postinit_actions = [_add_base_model_into_base_model_meta]  # drop after create
 
-    __presave_actions__: list = list()
-    __presetters__: dict = dict()
+    __presave_actions__: list = list()  # names of `presave_action`s
+    __presetters__: dict = dict()  # {attr: attribute_presetter}
+    __executable_fields__: tuple = tuple()  # (name, field, need_argument)
+    __record__: type = None  # namedtuple of columns, set by metaclass
+    objects = None  # BaseManager, set by metaclass
 
     id = IdField(name="id")  # after creation it will delete
 
     def __init__(self, *args, **kwargs):
-        for (name, field_class) in self.__table__.columns.items():
-            if isinstance(field_class, FieldExecutable):
-                if name in kwargs.keys():
-                    kwargs[name] = field_class.execute(kwargs[name])
-                elif not field_class.need_argument:
-                    kwargs[name] = field_class.execute()
+        # Models get a generated `__init__` with the same logic, this one
+        # is only called by models with their own `__init__`
+        for (name, field_class, need_argument) in self.__executable_fields__:
+            if name in kwargs:
+                kwargs[name] = field_class.execute(kwargs[name])
+            elif not need_argument:
+                kwargs[name] = field_class.execute()
 
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def presave_batch(cls, instances: list):
+        """
+        Executes all presave actions of the model over the objects. It is
+        called by the session once per flush for each model.
+        """
+
+        for action_name in cls.__presave_actions__:
+            action: Callable = getattr(cls, action_name)
+            action(instances)
+
     def _set_presave(self):
-        for action_name in self.__presave_actions__:
-            action: Callable = getattr(self, action_name)
-            action()
-
-    def __setattr__(self, key, value):
-        if key in self.__presetters__:
-            value = self.__presetters__[key](self, value)
-        super().__setattr__(key, value)
+        self.presave_batch([self])
+
+    @classmethod
+    def increment(cls, ids, **deltas) -> int:
+        """See `BaseManager.increment`."""
+        return cls.objects.increment(ids, **deltas)
+
+    @classmethod
+    def m2m_link(cls, field: str, pairs, **kwargs) -> int:
+        """See `BaseManager.m2m_link`."""
+        return cls.objects.m2m_link(field, pairs, **kwargs)
+
+    @classmethod
+    def m2m_unlink(cls, field: str, pairs, **kwargs) -> int:
+        """See `BaseManager.m2m_unlink`."""
+        return cls.objects.m2m_unlink(field, pairs, **kwargs)
 
 
 BaseModel: BaseModelMeta
@@ -0,0 +1,81 @@
+"""
+Hooks of the models that are executed by the session at flush time.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .utils import attribute_presetter, presetted_value
+
+
+__all_for_module__ = ["run_flush_hooks"]
+__all__ = __all_for_module__ + [
+    "run_deferred_presetters",
+    "run_presave_actions",
+]
+
+
+_executor: ThreadPoolExecutor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix="presetter")
+    return _executor
+
+
+def run_deferred_presetters(instances: Iterable):
+    """
+    Executes the pending deferred presetters of the objects: all values
+    of the same presetter are processed together.
+    """
+
+    groups: dict[tuple[type, str], list] = dict()
+    for instance in instances:
+        pending = instance.__dict__.pop("_deferred_presetters", None)
+        for attr in pending or ():
+            groups.setdefault((type(instance), attr), []).append(instance)
+
+    for ((model, attr), group) in groups.items():
+        presetter: attribute_presetter = model.__presetters__[attr]
+        values = [getattr(instance, attr) for instance in group]
+
+        if presetter.parallel and len(group) > 1:
+            results = get_executor().map(presetter.call, group, values)
+        else:
+            results = map(presetter.call, group, values)
+
+        for (instance, result) in zip(group, results):
+            setattr(instance, attr, presetted_value(result))
+
+
+def run_presave_actions(instances: Iterable):
+    """Calls `presave_batch` once for each model with its objects."""
+
+    groups: dict[type, list] = dict()
+    for instance in instances:
+        if getattr(type(instance), "__presave_actions__", None):
+            groups.setdefault(type(instance), []).append(instance)
+
+    for (model, group) in groups.items():
+        model.presave_batch(group)
+
+
+def run_flush_hooks(instances: Iterable):
+    """
+    Everything that must be done with the objects right before they are
+    written to the database.
+    """
+
+    instances = list(instances)
+    run_deferred_presetters(instances)
+    run_presave_actions(instances)
+
+
+@event.listens_for(Session, "before_flush")
+def before_flush(session: Session, flush_context, instances):
+    run_flush_hooks(list(session.new) + list(session.dirty))
@@ -1,23 +1,57 @@
+from __future__ import annotations
 from types import FunctionType
+from typing import Callable
+
 from sqlalchemy.orm.decl_api import DeclarativeMeta
+from sqlalchemy.sql.expression import text
+from sqlalchemy.sql.schema import Index
 
 
 __all_for_module__ = [
     "attribute_presetter",
+    "presave_action",
+    "generate_model_init",
     "get_model_primary_key",
     "droppable_attribute",
     "PostInitCreator",
+    "ModelIndex",
 ]
 ___all__ = __all_for_module__
 
 
 class attribute_presetter:
+    """
+    Decorator for a function that changes the value before it is set to
+    the model attribute.
+
+    A `deferred` presetter does not change the value on assignment, the
+    raw value is kept until the session flush, and then the presetters
+    of all new and changed objects are executed together (in threads,
+    if `parallel`, which is worth it only for functions that release
+    the GIL).
+
+    >>> @attribute_presetter("password", deferred=True)
+    >>> def password_setter(self, value):
+    >>>     return self.generate_password(value)
+    """
+
     to_attr: str = None
     call: FunctionType = None
+    deferred: bool = False
+    parallel: bool = False
 
-    def __new__(cls, name: str, link: FunctionType = None):
+    def __new__(
+            cls,
+            name: str,
+            link: FunctionType = None,
+            *,
+            deferred: bool = False,
+            parallel: bool = False,
+    ):
         self = super().__new__(cls)
         self.to_attr = name
+        self.deferred = deferred
+        self.parallel = parallel
         if link is not None:
             self = self(link)
         return self
@@ -27,11 +61,83 @@ class attribute_presetter:
         return self
 
 
+class presave_action:
+    """
+    Decorator for a model function that is executed right before the
+    objects are written to the database.
+
+    The function becomes a `classmethod` and is called once per flush
+    with the list of all new and changed objects of the model, so
+    derived fields can be calculated for all objects at once.
+
+    >>> @presave_action
+    >>> def set_level(cls, persons):
+    >>>     for person in persons:
+    >>>         person.level = cls.get_level(person.experience)
+    """
+
+    def __init__(self, func: FunctionType):
+        self.call = func
+
+
+class presetted_value:
+    """
+    A value already processed by a deferred presetter, which is set to
+    the attribute as is.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
 class droppable_attribute:
     def __init__(self, attr):
         self.value = attr
 
 
+def generate_model_init(
+        executable_fields: tuple[tuple[str, object, bool], ...],
+        model_init: FunctionType,
+) -> FunctionType:
+    """
+    Generates the `__init__` of a model (the same way as `dataclasses`
+    do), in which the executable fields are written out one by one.
+
+    For fields `pepper` (`need_argument = False`) and `fights` it will
+    be like:
+
+    >>> def __init__(self, *args, **kwargs):
+    >>>     if "pepper" in kwargs:
+    >>>         kwargs["pepper"] = field_0.execute(kwargs["pepper"])
+    >>>     else:
+    >>>         kwargs["pepper"] = field_0.execute()
+    >>>     if "fights" in kwargs:
+    >>>         kwargs["fights"] = field_1.execute(kwargs["fights"])
+    >>>     model_init(self, *args, **kwargs)
+    """
+
+    namespace = {"model_init": model_init}
+    lines = ["def __init__(self, *args, **kwargs):"]
+    for (i, (name, field, need_argument)) in enumerate(executable_fields):
+        field_var = f"field_{i}"
+        namespace[field_var] = field
+        lines += [
+            f"    if {name!r} in kwargs:",
+            f"        kwargs[{name!r}] = {field_var}.execute(kwargs[{name!r}])",
+        ]
+        if not need_argument:
+            lines += [
+                "    else:",
+                f"        kwargs[{name!r}] = {field_var}.execute()",
+            ]
+    lines.append("    model_init(self, *args, **kwargs)")
+
+    exec("\n".join(lines), namespace)
+    init = namespace["__init__"]
+    init.__generated__ = True
+    return init
+
+
 def get_model_primary_key(model: DeclarativeMeta) -> type:
     return model.__table__.primary_key.columns[0]
 
@@ -44,3 +150,82 @@ class PostInitCreator:
 
     def __call__(self, model_cls):
         self.call(model_cls, *self.args, **self.kwargs)
+
+
+class ModelIndex:
+    """
+    Description of an index from `Info.indexes`, which is turned into
+    an `Index` object when the model is created.
+
+    In `Info.indexes` you can write a column name (single index), a
+    tuple of names (composite index) or this class, if you need a unique
+    or partial index. The `where` condition is either a string of SQL
+    or a function that gets the table columns.
+
+    >>> class Info:
+    >>>     indexes = [
+    >>>         "token",
+    >>>         ("login", "is_deleted"),
+    >>>         ModelIndex("login", where=lambda c: c.is_deleted == false()),
+    >>>         ModelIndex("name", unique=True, where="is_deleted = 0"),
+    >>>     ]
+    """
+
+    def __init__(
+            self,
+            *fields: str,
+            unique: bool = False,
+            where: str | Callable = None,
+            name: str = None,
+    ):
+        if not fields:
+            raise ValueError("An index must have at least one field")
+        self.fields = fields
+        self.unique = unique
+        self.where = where
+        self.name = name
+
+    def __repr__(self):
+        return "ModelIndex({fields}, unique={unique}, where={where})".format(
+            fields=", ".join(self.fields),
+            unique=self.unique,
+            where=self.where,
+        )
+
+    @classmethod
+    def from_info(cls, value: str | tuple | list | ModelIndex) -> ModelIndex:
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls(value)
+        if isinstance(value, (tuple, list)):
+            return cls(*value)
+        raise TypeError(f"Incorrect index description <{value!r}>")
+
+    def get_name(self, tablename: str) -> str:
+        if self.name is not None:
+            return self.name
+        prefix = "ux" if self.unique else "ix"
+        name = f"{prefix}_{tablename}_" + "_".join(self.fields)
+        if self.where is not None:
+            name += "_partial"
+        return name
+
+    def create(self, model: DeclarativeMeta) -> Index:
+        """Creates an index and binds it to the model table."""
+
+        table = model.__table__
+        columns = [table.columns[field] for field in self.fields]
+
+        kwargs = dict()
+        if self.where is not None:
+            where = self.where
+            if isinstance(where, str):
+                where = text(where)
+            else:
+                where = where(table.columns)
+            kwargs["sqlite_where"] = where
+            kwargs["postgresql_where"] = where
+
+        name = self.get_name(table.name)
+        return Index(name, *columns, unique=self.unique, **kwargs)
@@ -1,8 +1,20 @@
 from .func import __all_for_module__ as __func_all__
 from .fixture import __all_for_module__ as __fixture_all__
+from .exporter import __all_for_module__ as __exporter_all__
+from .index_advisor import __all_for_module__ as __index_advisor_all__
+from .serializer import __all_for_module__ as __serializer_all__
 
 from .func import *
 from .fixture import *
+from .exporter import *
+from .index_advisor import *
+from .serializer import *
 
-__all_for_module__ = __func_all__ + __fixture_all__
+__all_for_module__ = (
+    __func_all__
+    + __fixture_all__
+    + __exporter_all__
+    + __index_advisor_all__
+    + __serializer_all__
+)
 __all__ = __all_for_module__
@@ -0,0 +1,236 @@
+"""
+Streaming export of the tables to NDJSON, CSV or YAML fixture streams.
+
+The rows are read with a server-side cursor (where the driver supports
+it) in batches and written to the file one by one, so the memory does
+not depend on the size of the table.
+"""
+
+import os
+import csv
+import gzip
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, IO, Iterable, Iterator, Sequence
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:  # PyYAML without libyaml
+    from yaml import SafeDumper
+
+from sqlalchemy import select
+
+from ..managers.session import db_session
+from ..models.base import BaseModelMeta
+from .fixture import STREAM_DEPENDS, STREAM_TABLE, get_foreign_depends
+from .serializer import JsonSerializer
+
+
+__all_for_module__ = ["TableExporter"]
+___all__ = __all_for_module__ + ["EXPORT_FORMATS"]
+
+
+# {file suffix: format}
+EXPORT_FORMATS = {
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+# one row per line, whatever its length
+YAML_LINE_WIDTH = 2 ** 31 - 1
+
+
+def yaml_value(value: Any) -> Any:
+    # `SafeDumper` has no representer for `Decimal`
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class TableExporter:
+    """
+    Writes the rows of the table of a model to a file:
+
+    - `ndjson` - one JSON object per line
+    - `csv` - a header with the field names and a line per row, the
+        file can be loaded back with `FixtureCreator` if it is named by
+        the table (`user.csv`)
+    - `yaml` - a multi-document stream in the format of
+        `FixtureCreator.create_from_stream`
+
+    With `header` the NDJSON stream also starts with the header document
+    of the fixtures (`{"__table__": ...}`), the YAML stream always does.
+
+    Only the selected columns are read, and the rows are Core rows, not
+    objects, so nothing is kept in the session.
+
+    >>> exporter = TableExporter(UserModel, exclude=["password", "pepper", "token"])
+    >>> exporter.export("backups/user.ndjson.gz")  # the format and gzip by the name
+    """
+
+    formats = ("ndjson", "csv", "yaml")
+
+    def __init__(
+            self,
+            model: BaseModelMeta,
+            fields: Sequence[str] = None,
+            exclude: Iterable[str] = (),
+            batch_size: int = 1000,
+    ):
+        columns = model.__table__.columns
+        if fields is None:
+            fields = [column.key for column in columns]
+        for field in fields:
+            if field not in columns:
+                raise ValueError(f"<{model.__tablename__}> has no column <{field}>")
+        exclude = set(exclude)
+
+        self.model = model
+        self.fields = tuple(str(field) for field in fields if field not in exclude)
+        self.batch_size = batch_size
+        self.serializer = JsonSerializer(model, self.fields)
+
+    def __repr__(self):
+        return "{}(model={}, fields={})".format(
+            self.__class__.__name__,
+            self.model.__name__,
+            len(self.fields),
+        )
+
+    def select(self, *criteria):
+        """`SELECT` of the fields in the order of the primary key."""
+
+        table = self.model.__table__
+        return (
+            select(*(table.columns[field] for field in self.fields))
+            .where(*criteria)
+            .order_by(*table.primary_key)
+        )
+
+    def iter_rows(self, *criteria) -> Iterator:
+        result = db_session.session.execute(
+            self.select(*criteria),
+            execution_options={
+                "stream_results": True,
+                "yield_per": self.batch_size,
+            },
+        )
+        for partition in result.partitions(self.batch_size):
+            yield from partition
+
+    # ======== WRITERS ========
+
+    def write(
+            self,
+            file: IO[str],
+            *criteria,
+            data_format: str = "ndjson",
+            header: bool = False,
+    ) -> int:
+        """Writes the rows to an open text file, returns their number."""
+
+        if data_format not in self.formats:
+            raise ValueError(f"{data_format!r} export format is not supported")
+        writer = getattr(self, f"write_{data_format}")
+        return writer(file, self.iter_rows(*criteria), header)
+
+    def write_ndjson(self, file: IO[str], rows: Iterable, header: bool) -> int:
+        if header:
+            file.write(self.serializer.backend(self.get_header()).decode() + "\n")
+
+        dumps_one = self.serializer.dumps_one
+        count = 0
+        for row in rows:
+            file.write(dumps_one(row).decode() + "\n")
+            count += 1
+        return count
+
+    def write_csv(self, file: IO[str], rows: Iterable, header: bool) -> int:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(self.fields)
+
+        count = 0
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+        return count
+
+    def write_yaml(self, file: IO[str], rows: Iterable, header: bool) -> int:
+        fields = self.fields
+        count = 0
+
+        def documents():
+            nonlocal count
+            yield self.get_header()
+            for row in rows:
+                yield {field: yaml_value(value) for (field, value) in zip(fields, row)}
+                count += 1
+
+        # `dump_all` takes the documents one by one from the generator
+        yaml.dump_all(
+            documents(),
+            file,
+            Dumper=SafeDumper,
+            explicit_start=True,
+            default_flow_style=True,
+            sort_keys=False,
+            allow_unicode=True,
+            width=YAML_LINE_WIDTH,
+        )
+        return count
+
+    def get_header(self) -> dict[str, Any]:
+        # table names are `quoted_name`, which the YAML dumper does not know
+        return {
+            STREAM_TABLE: str(self.model.__tablename__),
+            STREAM_DEPENDS: [str(name) for name in get_foreign_depends(self.model)],
+        }
+
+    # ==============================
+
+    def export(
+            self,
+            path: str | Path,
+            *criteria,
+            data_format: str = None,
+            compress: bool = None,
+            header: bool = False,
+    ) -> int:
+        """
+        Writes the rows to the file: the format and gzip compression are
+        taken from the name of the file (`person.csv.gz`), if they are
+        not set. The file is written next to the target and replaces it
+        only when the export is finished. Returns the number of rows.
+        """
+
+        path = Path(path)
+        suffixes = path.suffixes
+        if compress is None:
+            compress = bool(suffixes) and suffixes[-1] == ".gz"
+        if data_format is None:
+            if suffixes and suffixes[-1] == ".gz":
+                suffixes = suffixes[:-1]
+            if not suffixes or suffixes[-1] not in EXPORT_FORMATS:
+                raise ValueError(f"Unknown export format of <{path.name}>")
+            data_format = EXPORT_FORMATS[suffixes[-1]]
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        opener = gzip.open if compress else open
+        try:
+            with opener(temp_path, "wt", encoding="utf-8", newline="") as file:
+                count = self.write(
+                    file,
+                    *criteria,
+                    data_format=data_format,
+                    header=header,
+                )
+        except BaseException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+        os.replace(temp_path, path)
+        return count
@@ -1,17 +1,42 @@
+import os
+import csv
 import json
+import time
+import sqlite3
+import hashlib
 import graphlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from functools import partial
 from pathlib import Path
-from typing import Callable, IO, Optional, Any
+from typing import Callable, IO, Iterator, Optional, Any
 
 import yaml
 
-from ...lib.func import get_all_files_from_directory_generator, frozendict
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML without libyaml
+    from yaml import SafeLoader
+
+from sqlalchemy import and_, bindparam, delete, tuple_, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from ...lib.func import get_all_files_from_directory_generator, frozendict, chunked
 from ..managers.session import db_session
 from ..models.base import ModelWorker, BaseModelMeta
+from ..models.hooks import run_presave_actions
 
 
 __all_for_module__ = ["FixtureCreator"]
 ___all__ = __all_for_module__ + [
+    "CreationReport",
+    "TableDiff",
+    "SyncDiff",
+    "ReferenceResolver",
+    "RowCoercer",
+    "PendingReference",
     "TABLENAME",
     "FIELD_NAME",
     "FIELD_VALUE",
@@ -39,16 +64,390 @@ TABLE_DATA = dict[
 
 DATA_TYPE = dict[TABLENAME, TABLE_DATA]
 
+# (column, referenced table, referenced column)
+REFERENCE = tuple[FIELD_NAME, TABLENAME, FIELD_NAME]
+
+# a header document of the stream, the rows after it belong to the table
+STREAM_TABLE = "__table__"
+STREAM_DEPENDS = "__depends__"
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def is_yaml_file(filename: str) -> bool:
+    return filename.endswith(".yaml") or filename.endswith(".yml")
+
+
+def is_json_file(filename: str) -> bool:
+    return filename.endswith(".json")
+
+
+def is_ndjson_file(filename: str) -> bool:
+    return filename.endswith(".ndjson") or filename.endswith(".jsonl")
+
+
+def is_csv_file(filename: str) -> bool:
+    return filename.endswith(".csv")
+
+
+def load_yaml(file: IO) -> DATA_TYPE:
+    return yaml.load(file, Loader=SafeLoader)
+
+
+def read_yaml_documents(file: IO) -> Iterator[dict]:
+    return yaml.load_all(file, Loader=SafeLoader)
+
+
+def read_ndjson_documents(file: IO) -> Iterator[dict]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv_documents(file: IO) -> Iterator[dict]:
+    """
+    A CSV file holds the rows of one table, named by the file name up to
+    the first dot (`item.csv`, `item.0001.csv`), so it starts with the
+    header document of that table. Empty cells are skipped, the fields
+    get their defaults.
+    """
+
+    tablename = os.path.basename(file.name).split(".", 1)[0]
+    yield {STREAM_TABLE: tablename}
+    for row in csv.DictReader(file):
+        yield {field: value for (field, value) in row.items() if value != ""}
+
+
+def parse_file(file: str, parse_func: Callable[[IO], DATA_TYPE]) -> DATA_TYPE:
+    with open(file) as opened_file:
+        return parse_func(opened_file)
+
+
+class CreationReport:
+    """Rows and time of each created table, in the order of creation."""
+
+    def __init__(self):
+        # {tablename: (topological level, rows, seconds)}
+        self.tables: dict[TABLENAME, tuple[int, int, float]] = dict()
+
+    def add(self, tablename: TABLENAME, level: int, count: int, seconds: float):
+        self.tables[tablename] = (level, count, seconds)
+
+    @property
+    def total_count(self) -> int:
+        return sum(count for (_, count, _) in self.tables.values())
+
+    @property
+    def total_time(self) -> float:
+        return sum(seconds for (_, _, seconds) in self.tables.values())
+
+    def __str__(self):
+        lines = [
+            "{:>2}  {:<40} {:>8} rows {:>10.2f} ms".format(
+                level, tablename, count, seconds * 1000)
+            for (tablename, (level, count, seconds)) in self.tables.items()
+        ]
+        lines.append("    {:<40} {:>8} rows {:>10.2f} ms".format(
+            "total", self.total_count, self.total_time * 1000))
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "CreationReport(tables={}, rows={})".format(
+            len(self.tables), self.total_count)
+
+
+class TableDiff:
+    """Changes of one table that `FixtureCreator.sync` makes."""
+
+    def __init__(self, tablename: TABLENAME, key_fields: tuple[str, ...]):
+        self.tablename = tablename
+        self.key_fields = key_fields
+        self.inserts: list[MODEL_DATA] = []
+        # (primary key, natural key, {field: (old value, new value)})
+        self.updates: list[tuple[tuple, tuple, dict[str, tuple[Any, Any]]]] = []
+        self.deletes: list[tuple[tuple, tuple]] = []  # (primary key, natural key)
+
+    def __bool__(self):
+        return bool(self.inserts or self.updates or self.deletes)
+
+    def format_key(self, key: tuple) -> str:
+        return ", ".join(
+            f"{field}={value!r}"
+            for (field, value) in zip(self.key_fields, key)
+        )
+
+    def lines(self) -> list[str]:
+        lines = []
+        for row in self.inserts:
+            key = tuple(row.get(field) for field in self.key_fields)
+            lines.append(f"+ {self.tablename} ({self.format_key(key)})")
+        for (_, key, changes) in self.updates:
+            lines.append(f"~ {self.tablename} ({self.format_key(key)})")
+            for (field, (old, new)) in changes.items():
+                lines.append(f"    {field}: {old!r} -> {new!r}")
+        for (_, key) in self.deletes:
+            lines.append(f"- {self.tablename} ({self.format_key(key)})")
+        return lines
+
+
+class SyncDiff:
+    """All changes of `FixtureCreator.sync`, printable as a diff."""
+
+    def __init__(self):
+        self.tables: dict[TABLENAME, TableDiff] = dict()
+
+    def __bool__(self):
+        return any(self.tables.values())
+
+    def __str__(self):
+        lines = [line for diff in self.tables.values() for line in diff.lines()]
+        return "\n".join(lines) if lines else "No changes"
+
+    def __repr__(self):
+        return "SyncDiff(inserts={}, updates={}, deletes={})".format(
+            sum(len(diff.inserts) for diff in self.tables.values()),
+            sum(len(diff.updates) for diff in self.tables.values()),
+            sum(len(diff.deletes) for diff in self.tables.values()),
+        )
+
+
+def get_key_fields(model: BaseModelMeta) -> tuple[str, ...]:
+    """Fields of `Info.natural_key` of the model, the primary key by default."""
+
+    natural_key = model.Info.natural_key
+    if natural_key is None:
+        return tuple(str(column.key) for column in model.__table__.primary_key)
+    if isinstance(natural_key, str):
+        return (natural_key,)
+    return tuple(natural_key)
+
+
+def get_foreign_depends(model: BaseModelMeta) -> list[TABLENAME]:
+    """The tables that the model refers to by its foreign keys."""
+
+    depends = []
+    for foreign_key in model.__table__.foreign_keys:
+        tablename = foreign_key.column.table.name
+        if tablename != model.__tablename__ and tablename not in depends:
+            depends.append(tablename)
+    return depends
+
+
+def parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean value {value!r}")
+
+
+CONVERTERS: dict[type, Callable[[str], Any]] = {
+    int: int,
+    float: float,
+    Decimal: Decimal,
+    bool: parse_bool,
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time_of_day: time_of_day.fromisoformat,
+}
+
+
+def get_converter(column) -> Optional[Callable[[str], Any]]:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    return CONVERTERS.get(python_type, None)
+
+
+class PendingReference:
+    """A reference to a row that a dry run of `sync` would insert."""
+
+    def __init__(self, tablename: TABLENAME, key: tuple):
+        self.tablename = tablename
+        self.key = key
+
+    def __repr__(self):
+        return f"<new {self.tablename} {self.key!r}>"
+
+
+class ReferenceResolver:
+    """
+    Replaces references to other tables by their natural keys in the
+    fixture rows with the primary keys:
+
+    >>> # item: {item_type: sword, name: dagger}
+    >>> # -> {item_type_id: 1, name: dagger}
+
+    A reference is written by the name of the referenced table, and the
+    value is its `Info.natural_key` (a list for a composite key). For
+    each referenced table one map `natural key -> primary key` is built
+    with one query, when the first reference to it is resolved.
+    """
+
+    def __init__(self, models: dict[TABLENAME, BaseModelMeta]):
+        self.models = models
+        self.maps: dict[tuple[TABLENAME, str], dict[tuple, Any]] = dict()
+        # {tablename: keys} of the rows that are not inserted yet
+        self.pending: dict[TABLENAME, set[tuple]] = dict()
+        self._references: dict[TABLENAME, dict[str, REFERENCE]] = dict()
+
+    def get_references(self, model: BaseModelMeta) -> dict[str, REFERENCE]:
+        """`{alias: (column, referenced table, referenced column)}` of the model."""
+
+        tablename = model.__tablename__
+        if tablename in self._references:
+            return self._references[tablename]
+
+        references = dict()
+        ambiguous = set()
+        columns = model.__table__.columns
+        for column in columns:
+            for foreign_key in column.foreign_keys:
+                target = foreign_key.column
+                alias = target.table.name
+                if alias in references or alias in columns:
+                    ambiguous.add(alias)
+                references[alias] = (str(column.key), alias, str(target.key))
+        for alias in ambiguous:
+            references.pop(alias)
+
+        self._references[tablename] = references
+        return references
+
+    def get_map(self, tablename: TABLENAME, target: str) -> dict[tuple, Any]:
+        if (tablename, target) not in self.maps:
+            # the parents can still be in the session, as in `create`
+            db_session.session.flush()
+            model = self.models[tablename]
+            key_fields = get_key_fields(model)
+            self.maps[(tablename, target)] = {
+                tuple(getattr(record, field) for field in key_fields):
+                    getattr(record, target)
+                for record in model.objects.records()
+            }
+        return self.maps[(tablename, target)]
+
+    def invalidate(self, tablename: TABLENAME):
+        """The table has been changed, its maps must be built again."""
+
+        for key in list(self.maps):
+            if key[0] == tablename:
+                del self.maps[key]
+
+    def resolve(self, model: BaseModelMeta, rows: list[MODEL_DATA]) -> list[MODEL_DATA]:
+        """Returns the rows with the resolved references (as new dicts)."""
+
+        references = self.get_references(model)
+        if not references:
+            return rows
+
+        resolved_rows = []
+        for row in rows:
+            aliases = [alias for alias in row if alias in references]
+            if aliases:
+                row = dict(row)
+                for alias in aliases:
+                    (column, tablename, target) = references[alias]
+                    row[column] = self.resolve_value(tablename, target, row.pop(alias))
+            resolved_rows.append(row)
+        return resolved_rows
+
+    def resolve_value(self, tablename: TABLENAME, target: str, value: Any) -> Any:
+        key = tuple(value) if isinstance(value, list) else (value,)
+        mapping = self.get_map(tablename, target)
+        if key in mapping:
+            return mapping[key]
+        if key in self.pending.get(tablename, ()):
+            return PendingReference(tablename, key)
+        raise ValueError(f"Unknown reference {key} to <{tablename}>")
+
+
+class RowCoercer:
+    """
+    Converts the text values of the fixture rows (CSV cells, dates in
+    JSON) to the types of the columns of the model. The converters are
+    chosen once by the types of the columns, not guessed by each value;
+    values that are not strings are left as they are.
+
+    References (`item_type: sword`) are converted by the type of the
+    natural key of the referenced table, if it is a single field.
+    """
+
+    def __init__(self, model: BaseModelMeta, resolver: ReferenceResolver):
+        self.tablename = model.__tablename__
+        self.converters: dict[str, Callable[[str], Any]] = dict()
+        for column in model.__table__.columns:
+            converter = get_converter(column)
+            if converter is not None:
+                self.converters[str(column.key)] = converter
+
+        references = resolver.get_references(model)
+        for (alias, (_, tablename, _)) in references.items():
+            target_model = resolver.models.get(tablename, None)
+            if target_model is None:
+                continue
+            key_fields = get_key_fields(target_model)
+            if len(key_fields) != 1:
+                continue
+            converter = get_converter(target_model.__table__.columns[key_fields[0]])
+            if converter is not None:
+                self.converters[alias] = converter
+
+    def __call__(self, rows: list[MODEL_DATA]) -> list[MODEL_DATA]:
+        """Converts the values of the rows in place."""
+
+        converters = self.converters
+        if not converters:
+            return rows
+
+        for row in rows:
+            for (field, value) in row.items():
+                converter = converters.get(field, None)
+                if converter is None or not isinstance(value, str):
+                    continue
+                try:
+                    row[field] = converter(value)
+                except (ValueError, ArithmeticError):
+                    raise ValueError(
+                        f"Invalid value {value!r} of <{self.tablename}.{field}>")
+        return rows
+
 
 class FixtureCreator:
     data: DATA_TYPE
     models: frozendict[str, BaseModelMeta]
     supported_types: dict[str, Callable[[str | Path], None]]
+    stream_types: dict[str, tuple[Callable[[str], bool], Callable[[IO], Iterator]]]
+
+    # smaller data is parsed in the current process, the pool costs more
+    parallel_min_size: int = 1024 * 1024
 
-    def __init__(self, data_path: str | Path = None, data_type: str = "yaml"):
+    def __init__(
+            self,
+            data_path: str | Path = None,
+            data_type: str = "yaml",
+            workers: int = None,
+    ):
+        self.workers = workers  # processes for parsing, all CPUs by default
         self.supported_types = {
             "json": self.add_data_from_json,
             "yaml": self.add_data_from_yaml,
+            "csv": self.add_data_from_csv,
+            "ndjson": self.add_data_from_ndjson,
+        }
+        self.file_filters = {
+            "json": is_json_file,
+            "yaml": is_yaml_file,
+            "csv": is_csv_file,
+            "ndjson": is_ndjson_file,
+        }
+        self.stream_types = {
+            "yaml": (is_yaml_file, read_yaml_documents),
+            "ndjson": (is_ndjson_file, read_ndjson_documents),
+            "csv": (is_csv_file, read_csv_documents),
         }
 
         self.models = frozendict({
@@ -56,19 +455,64 @@ class FixtureCreator:
             for model in ModelWorker.registry.mappers
         })
 
+        self.resolver = ReferenceResolver(self.models)
+        self._coercers: dict[TABLENAME, RowCoercer] = dict()
+
         self.data = dict()
         if data_path:
             self.add_data_from_type(data_path, data_type)
 
     def add_data_from_yaml(self, data_path: str | Path):
-        filter_yaml = lambda f: (f.endswith(".yaml") or f.endswith(".yml"))
-        parse_yaml = yaml.safe_load
-        self.pasre_data_from_files(data_path, filter_yaml, parse_yaml)
+        self.pasre_data_from_files(data_path, is_yaml_file, load_yaml)
 
     def add_data_from_json(self, data_path: str | Path):
-        filter_json = lambda f: f.endswith(".json")
         parse_json = json.load
-        self.pasre_data_from_files(data_path, filter_json, parse_json)
+        self.pasre_data_from_files(data_path, is_json_file, parse_json)
+
+    def add_data_from_csv(self, data_path: str | Path):
+        self.add_data_from_stream(data_path, "csv")
+
+    def add_data_from_ndjson(self, data_path: str | Path):
+        self.add_data_from_stream(data_path, "ndjson")
+
+    def add_data_from_stream(self, data_path: str | Path, data_type: str):
+        """
+        Adds the rows of the stream files (see `create_from_stream`) to
+        `self.data`, with the values converted to the types of the
+        columns. The tables also depend on the tables of their foreign
+        keys, since CSV files have no place for `depends`.
+        """
+
+        (filter_func, reader) = self.stream_types[data_type]
+        files = sorted(get_all_files_from_directory_generator(data_path, filter_func))
+
+        tables = self.read_stream_tables(files, reader)
+        self.add_foreign_depends(tables)
+        for (tablename, table) in tables.items():
+            rows = list(self.read_stream_rows(table["files"], reader, tablename))
+            self.add_data({tablename: {
+                "depends": table["depends"],
+                "data": self.coerce(tablename, rows),
+            }})
+
+    def get_coercer(self, tablename: TABLENAME) -> RowCoercer:
+        if tablename not in self._coercers:
+            if tablename not in self.models:
+                raise ValueError(f"Model named <{tablename}> is missing")
+            model = self.models[tablename]
+            self._coercers[tablename] = RowCoercer(model, self.resolver)
+        return self._coercers[tablename]
+
+    def coerce(self, tablename: TABLENAME, rows: list[MODEL_DATA]) -> list[MODEL_DATA]:
+        return self.get_coercer(tablename)(rows)
+
+    def add_foreign_depends(self, tables: dict[TABLENAME, dict[str, list]]):
+        for (tablename, table) in tables.items():
+            if tablename not in self.models:
+                continue
+            for depend in get_foreign_depends(self.models[tablename]):
+                if depend not in table["depends"]:
+                    table["depends"].append(depend)
 
     def create(self):
         order = self.get_creation_order()
@@ -78,11 +522,414 @@ class FixtureCreator:
 
         for model_name in order:
             model = self.models[model_name]
-            data_list = self.data[model_name]["data"]
+            data_list = self.resolver.resolve(model, self.data[model_name]["data"])
             model_list = [model(**data) for data in data_list]
             db_session.add(*model_list)
         db_session.commit()
 
+    def create_from_stream(
+            self,
+            data_path: str | Path,
+            data_type: str = "yaml",
+            chunk_size: int = 1000,
+    ) -> dict[TABLENAME, int]:
+        """
+        Streaming mode for large datasets: the rows are not collected in
+        `self.data`, but read from the files document by document and
+        inserted with `bulk_insert` in chunks of `chunk_size`, with a
+        commit after each chunk. So the memory depends on the size of a
+        chunk, not on the size of the data.
+
+        The files are YAML multi-document streams, NDJSON (one JSON
+        document per line) or CSV. A header document sets the table of
+        the rows after it:
+
+        >>> --- {__table__: item, __depends__: [item_type]}
+        >>> --- {name: dagger, item_type_id: 1}
+        >>> --- {name: rapier, item_type_id: 1, min_level: 6}
+
+        A CSV file is one table named by the file (`item.csv`). The
+        tables also depend on the tables of their foreign keys, and the
+        text values are converted to the types of the columns.
+
+        The files are read twice: first only for the headers to find the
+        order of the tables, then for the rows of each table in turn.
+        Returns the number of created rows of each table.
+        """
+
+        if data_type not in self.stream_types:
+            raise ValueError(f"{data_type!r} stream type is not supported")
+        (filter_func, reader) = self.stream_types[data_type]
+        files = sorted(get_all_files_from_directory_generator(data_path, filter_func))
+
+        tables = self.read_stream_tables(files, reader)
+        self.add_foreign_depends(tables)
+        order = self.sort_tables({
+            tablename: table["depends"]
+            for (tablename, table) in tables.items()
+        })
+        for model_name in order:
+            if model_name not in self.models:
+                raise ValueError(f"Model named <{model_name}> is missing")
+
+        counts = dict()
+        for tablename in order:
+            if tablename not in tables:
+                continue  # only a dependency, there are no rows for it
+            model = self.models[tablename]
+            rows = self.read_stream_rows(tables[tablename]["files"], reader, tablename)
+            counts[tablename] = 0
+            for chunk in chunked(rows, chunk_size):
+                chunk = self.resolver.resolve(model, self.coerce(tablename, chunk))
+                counts[tablename] += model.objects.bulk_insert(chunk, chunk_size)
+                db_session.commit()
+
+        return counts
+
+    @staticmethod
+    def read_stream_tables(
+            files: list[str],
+            reader: Callable[[IO], Iterator],
+    ) -> dict[TABLENAME, dict[str, list]]:
+        """The tables of the streams: their dependencies and files."""
+
+        tables = dict()
+        for file in files:
+            with open(file) as opened_file:
+                has_header = False
+                for document in reader(opened_file):
+                    if document is None:
+                        continue
+                    if STREAM_TABLE not in document:
+                        if not has_header:
+                            raise ValueError(f"Rows before the first header in {file}")
+                        continue
+                    has_header = True
+                    tablename = document[STREAM_TABLE]
+                    table = tables.setdefault(tablename, {"depends": [], "files": []})
+                    for depend in document.get(STREAM_DEPENDS, []):
+                        if depend not in table["depends"]:
+                            table["depends"].append(depend)
+                    if file not in table["files"]:
+                        table["files"].append(file)
+        return tables
+
+    @staticmethod
+    def read_stream_rows(
+            files: list[str],
+            reader: Callable[[IO], Iterator],
+            tablename: TABLENAME,
+    ) -> Iterator[MODEL_DATA]:
+        for file in files:
+            with open(file) as opened_file:
+                current_table = None
+                for document in reader(opened_file):
+                    if document is None:
+                        continue
+                    if STREAM_TABLE in document:
+                        current_table = document[STREAM_TABLE]
+                    elif current_table == tablename:
+                        yield document
+
+    def create_fast(self) -> CreationReport:
+        """
+        Creates the data with `bulk_insert` (`executemany` of Core
+        inserts) instead of adding objects to the session one by one.
+        Executable fields, presetters and presave actions are applied to
+        each chunk of rows together.
+
+        The tables are inserted by the levels of the dependency graph:
+        all the tables of a level depend only on the previous levels.
+        Everything is committed once at the end, like in `create`.
+        """
+
+        levels = self.iter_table_levels({
+            model_name: model_data["depends"]
+            for (model_name, model_data) in self.data.items()
+        })
+        report = CreationReport()
+        for (level, group) in enumerate(levels):
+            for model_name in group:
+                if model_name not in self.models:
+                    raise ValueError(f"Model named <{model_name}> is missing")
+                if model_name not in self.data:
+                    continue  # only a dependency, there are no rows for it
+
+                start = time.perf_counter()
+                model = self.models[model_name]
+                rows = self.resolver.resolve(model, self.data[model_name]["data"])
+                count = model.objects.bulk_insert(rows)
+                report.add(model_name, level, count, time.perf_counter() - start)
+
+        db_session.commit()
+        return report
+
+    def create_cached(
+            self,
+            data_path: str | Path,
+            cache_path: str | Path,
+            data_type: str = "yaml",
+            extra_key: str = "",
+    ) -> bool:
+        """
+        Creates the data from the files with `create_fast` and saves the
+        whole database as a snapshot, or restores the snapshot if it has
+        already been made. Returns whether the snapshot was restored.
+
+        The snapshots are named by the hash of the fixture files, the
+        schema of the tables and `extra_key` (anything else the data
+        depends on, for example the salt of the passwords), so any
+        change makes a new one. The database is copied with the SQLite
+        backup API, so only SQLite is supported.
+
+        The current content of the database is replaced: on a miss the
+        tables are created again before the fixtures.
+        """
+
+        bind = db_session.session.get_bind()
+        if bind.dialect.name != "sqlite":
+            raise ValueError("Fixture snapshots only support SQLite")
+
+        key = self.get_snapshot_key(data_path, data_type, extra_key)
+        snapshot = Path(cache_path) / f"fixtures_{key}.sqlite3"
+
+        db_session.commit()
+        if snapshot.exists():
+            connection = self.get_sqlite_connection()
+            source = sqlite3.connect(snapshot)
+            try:
+                source.backup(connection)
+            finally:
+                source.close()
+            db_session.session.expunge_all()
+            return True
+
+        # the snapshot must contain only the fixtures
+        db_session.session.close()
+        ModelWorker.metadata.drop_all(bind)
+        ModelWorker.metadata.create_all(bind)
+        self.add_data_from_type(data_path, data_type)
+        self.create_fast()
+
+        connection = self.get_sqlite_connection()
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = snapshot.with_suffix(".tmp")
+        target = sqlite3.connect(temp_path)
+        try:
+            connection.backup(target)
+        finally:
+            target.close()
+        os.replace(temp_path, snapshot)
+        return False
+
+    def get_snapshot_key(
+            self,
+            data_path: str | Path,
+            data_type: str = "yaml",
+            extra_key: str = "",
+    ) -> str:
+        """Hash of the fixture files and the schema of all tables."""
+
+        if data_type not in self.file_filters:
+            raise ValueError(f"{data_type!r} type is not supported")
+        files = sorted(get_all_files_from_directory_generator(
+            data_path,
+            self.file_filters[data_type],
+        ))
+
+        digest = hashlib.sha256()
+        for file in files:
+            digest.update(os.path.relpath(file, data_path).encode("utf-8"))
+            with open(file, "rb") as opened_file:
+                digest.update(hashlib.sha256(opened_file.read()).digest())
+
+        dialect = db_session.session.get_bind().dialect
+        for table in ModelWorker.metadata.sorted_tables:
+            digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+
+        digest.update(extra_key.encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    @staticmethod
+    def get_sqlite_connection() -> sqlite3.Connection:
+        """The `sqlite3` connection of the session."""
+
+        fairy = db_session.session.connection().connection
+        return getattr(fairy, "driver_connection", None) or fairy.connection
+
+    def sync(
+            self,
+            dry_run: bool = False,
+            delete_missing: bool = False,
+            chunk_size: int = 1000,
+    ) -> SyncDiff:
+        """
+        Brings the database to the state of the fixtures with as few
+        changes as possible: the rows are matched by `Info.natural_key`
+        of the model (the primary key by default), new rows are inserted,
+        changed fields are updated, and with `delete_missing` the rows
+        that are not in the fixtures are deleted. All changes are made
+        in batches and committed together.
+
+        Fields with presetters (like passwords) are not compared, since
+        the database has the already processed values.
+
+        With `dry_run` nothing is changed, the returned diff only shows
+        what would be done.
+
+        >>> creator = FixtureCreator(FIXTURE_FOLDER_PATH)
+        >>> print(creator.sync(dry_run=True))
+        >>> # ~ item (name='dagger')
+        >>> #     min_level: 0 -> 2
+        """
+
+        order = self.get_creation_order()
+        for model_name in order:
+            if model_name not in self.models:
+                raise ValueError(f"Model named <{model_name}> is missing")
+        order = [model_name for model_name in order if model_name in self.data]
+
+        # parents are created before the children and deleted after them,
+        # the references of the children are resolved after the parents
+        # are created
+        diff = SyncDiff()
+        for model_name in order:
+            model = self.models[model_name]
+            rows = self.resolver.resolve(model, self.data[model_name]["data"])
+            table_diff = self.get_table_diff(model, rows, delete_missing)
+            diff.tables[model_name] = table_diff
+
+            if dry_run:
+                key_fields = get_key_fields(model)
+                self.resolver.pending[model_name] = {
+                    tuple(row[field] for field in key_fields)
+                    for row in table_diff.inserts
+                }
+            else:
+                model.objects.bulk_insert(table_diff.inserts, chunk_size)
+                self.apply_updates(model, table_diff, chunk_size)
+                self.resolver.invalidate(model_name)
+
+        if dry_run:
+            self.resolver.pending.clear()
+            return diff
+
+        for model_name in reversed(order):
+            model = self.models[model_name]
+            self.apply_deletes(model, diff.tables[model_name], chunk_size)
+
+        db_session.commit()
+        return diff
+
+    def get_table_diff(
+            self,
+            model: BaseModelMeta,
+            rows: list[MODEL_DATA],
+            delete_missing: bool = False,
+    ) -> TableDiff:
+        tablename = model.__tablename__
+        key_fields = get_key_fields(model)
+        pk_fields = tuple(str(column.key) for column in model.__table__.primary_key)
+        # deferred presetters (passwords) are only applied at flush time
+        skipped = {
+            attr
+            for (attr, presetter) in model.__presetters__.items()
+            if presetter.deferred
+        } | set(key_fields)
+
+        get_key = lambda row: tuple(row[field] for field in key_fields)
+        get_pk = lambda row: tuple(row[field] for field in pk_fields)
+        current = {
+            get_key(record._asdict()): record
+            for record in model.objects.records()
+        }
+
+        diff = TableDiff(tablename, key_fields)
+        seen = set()
+        matched = []  # (natural key, record, object with the new values)
+        for row in rows:
+            try:
+                key = get_key(row)
+            except KeyError:
+                raise ValueError(
+                    f"Fixture row of <{tablename}> has no key {key_fields}: {row}")
+            if key in seen:
+                raise ValueError(f"Duplicate key {key} in fixtures of <{tablename}>")
+            seen.add(key)
+
+            record = current.get(key, None)
+            if record is None:
+                diff.inserts.append(row)
+                continue
+
+            # the values as the model would write them (executable fields,
+            # presetters), the other fields are taken from the database
+            instance = model(**row)
+            for (field, value) in record._asdict().items():
+                if field not in row:
+                    set_committed_value(instance, field, value)
+            matched.append((key, record, instance))
+
+        # derived fields, like in `bulk_insert`
+        run_presave_actions(instance for (_, _, instance) in matched)
+        for (key, record, instance) in matched:
+            values = instance.__dict__
+            changes = dict()
+            for (field, old) in record._asdict().items():
+                if field in skipped:
+                    continue
+                new = values.get(field, old)
+                if old != new:
+                    changes[field] = (old, new)
+            if changes:
+                diff.updates.append((get_pk(record._asdict()), key, changes))
+
+        if delete_missing:
+            for (key, record) in current.items():
+                if key not in seen:
+                    diff.deletes.append((get_pk(record._asdict()), key))
+
+        return diff
+
+    @staticmethod
+    def apply_updates(model: BaseModelMeta, diff: TableDiff, chunk_size: int):
+        """One `executemany` for each set of changed fields."""
+
+        table = model.__table__
+        pk_columns = list(table.primary_key)
+        where = and_(*(
+            column == bindparam(f"pk_{column.key}")
+            for column in pk_columns
+        ))
+
+        groups: dict[tuple[str, ...], list[dict]] = dict()
+        for (pk, _, changes) in diff.updates:
+            params = {f"v_{field}": new for (field, (_, new)) in changes.items()}
+            for (column, value) in zip(pk_columns, pk):
+                params[f"pk_{column.key}"] = value
+            groups.setdefault(tuple(changes), []).append(params)
+
+        for (fields, params) in groups.items():
+            values = {
+                table.columns[field]: bindparam(f"v_{field}")
+                for field in fields
+            }
+            if model.Info.versioned:
+                values[table.columns.version] = table.columns.version + 1
+            statement = update(table).where(where).values(values)
+            for chunk in chunked(params, chunk_size):
+                db_session.session.execute(statement, chunk)
+
+    @staticmethod
+    def apply_deletes(model: BaseModelMeta, diff: TableDiff, chunk_size: int):
+        pk_columns = tuple_(*model.__table__.primary_key)
+        pks = [pk for (pk, _) in diff.deletes]
+        for chunk in chunked(pks, chunk_size):
+            statement = delete(model.__table__).where(pk_columns.in_(chunk))
+            db_session.session.execute(statement)
+
     # ==============================
 
     def add_data_from_type(self, data_path: str | Path, data_type: str = "yaml"):
@@ -106,12 +953,34 @@ class FixtureCreator:
                 self.data[tablename] = model_data
 
     def get_creation_order(self):
+        return self.sort_tables({
+            model_name: model_data["depends"]
+            for (model_name, model_data) in self.data.items()
+        })
+
+    @classmethod
+    def sort_tables(cls, depends: dict[TABLENAME, list[TABLENAME]]) -> list[TABLENAME]:
+        return [
+            model_name
+            for group in cls.iter_table_levels(depends)
+            for model_name in group
+        ]
+
+    @staticmethod
+    def iter_table_levels(
+            depends: dict[TABLENAME, list[TABLENAME]],
+    ) -> Iterator[list[TABLENAME]]:
+        """
+        Groups of tables by the levels of the dependency graph: the
+        tables of each group depend only on the previous groups.
+        """
+
         sorter = graphlib.TopologicalSorter()
-        for (model_name, model_data) in self.data.items():
-            sorter.add(model_name, *model_data["depends"])
+        for (model_name, model_depends) in depends.items():
+            sorter.add(model_name, *model_depends)
 
         try:
-            topological_order = list(sorter.static_order())
+            sorter.prepare()
         except graphlib.CycleError as exc:
             msg = (
                     "The order of the dependencies of the fixtures is looped:\n"
@@ -119,7 +988,10 @@ class FixtureCreator:
             )
             raise ValueError(msg)
 
-        return topological_order
+        while sorter.is_active():
+            group = sorted(sorter.get_ready())
+            yield group
+            sorter.done(*group)
 
     def pasre_data_from_files(
             self,
@@ -127,9 +999,29 @@ class FixtureCreator:
             filter_func: Callable[[str], bool],
             parse_func: Callable[[IO], DATA_TYPE],
     ):
-        files = get_all_files_from_directory_generator(data_path, filter_func)
-        for file in files:
-            file_data = parse_func(open(file))
+        """
+        Parses the files in a process pool, if there are several of them
+        and they are large enough. The results are added in the order of
+        the sorted file names, whichever finishes first.
+        """
+
+        files = sorted(get_all_files_from_directory_generator(data_path, filter_func))
+        parse = partial(parse_file, parse_func=parse_func)
+
+        total_size = sum(os.path.getsize(file) for file in files)
+        is_parallel = (
+            len(files) > 1
+            and self.workers != 1
+            and total_size >= self.parallel_min_size
+        )
+        if is_parallel:
+            workers = min(len(files), self.workers or os.cpu_count() or 1)
+            with ProcessPoolExecutor(workers) as executor:
+                files_data = list(executor.map(parse, files))
+        else:
+            files_data = map(parse, files)
+
+        for file_data in files_data:
             self.add_data(file_data)
 
     def extend_model_data(self, tablename: str, model_data: TABLE_DATA):
@@ -1,23 +1,166 @@
+from typing import Any, Optional, Sequence
+
 from sqlalchemy.orm.decl_api import DeclarativeMeta
-from pydantic import create_model as create_pydantic_model
+from sqlalchemy.sql.schema import Column
+from pydantic import ValidationError, create_model as create_pydantic_model
+
+try:
+    from pydantic import TypeAdapter
+except ImportError:  # pydantic v1
+    TypeAdapter = None
 
 
 __all_for_module__ = [
     "generate_pydantic_model",
+    "validate_many",
 ]
-___all__ = __all_for_module__
+___all__ = __all_for_module__ + [
+    "SCHEMA_VARIANTS",
+    "BatchValidation",
+]
+
+
+SCHEMA_VARIANTS = ("read", "create", "update")
+
+_pydantic_models: dict[tuple[DeclarativeMeta, str], type] = dict()
+_list_adapters: dict[tuple[DeclarativeMeta, str], Any] = dict()  # pydantic v2
+
 
+def generate_pydantic_model(model: DeclarativeMeta, variant: str = "read") -> type:
+    """
+    Generates a `pydantic` model based on class field types. The result
+    is cached, so each schema of a model is created only once.
 
-def generate_pydantic_model(model: DeclarativeMeta) -> type:
-    """Generates a `pydantic` model based on class field types."""
+    Variants:
+    - `read` - the row as it is in the database
+    - `create` - fields that the database or the model fills in itself
+        (primary key, defaults, executable fields) are not required
+    - `update` - all fields are not required, without primary key
+    """
     # The basis of the code is taken from
     # https://github.com/tiangolo/pydantic-sqlalchemy/blob/master/pydantic_sqlalchemy/main.py
 
+    if variant not in SCHEMA_VARIANTS:
+        raise ValueError(f"Unknown schema variant <{variant}>")
+    if (model, variant) in _pydantic_models:
+        return _pydantic_models[(model, variant)]
+
     model_name = getattr(model, "__tablename__", "")
+    if variant != "read":
+        model_name += f"_{variant}"
+
+    self_filled = {
+        name
+        for (name, _, need_argument) in getattr(model, "__executable_fields__", ())
+        if not need_argument
+    }
+
     fields = dict()
     for field in model.__table__.columns:
+        field: Column
+        python_type = field.type.python_type
         default = None
-        if field.default is None and not field.nullable:
-            default = ...
-        fields[str(field.name)] = (field.type.python_type, default)
-    return create_pydantic_model(model_name, **fields)
+
+        if variant == "read":
+            if field.default is None and not field.nullable:
+                default = ...
+        elif variant == "create":
+            is_filled = (
+                field.default is not None
+                or field.server_default is not None
+                or field.name in self_filled
+                or (
+                    field.primary_key
+                    and field.autoincrement is not False
+                    and python_type is int
+                )
+            )
+            if not (is_filled or field.nullable):
+                default = ...
+        else:
+            if field.primary_key:
+                continue
+
+        if default is None:
+            python_type = Optional[python_type]
+        fields[str(field.name)] = (python_type, default)
+
+    pydantic_model = create_pydantic_model(model_name, **fields)
+    _pydantic_models[(model, variant)] = pydantic_model
+    return pydantic_model
+
+
+class BatchValidation:
+    """
+    The result of `validate_many`: validated rows (only the fields that
+    were passed, so the defaults are left to the model and database)
+    with their indexes in the original list, and errors of invalid rows
+    by their indexes.
+    """
+
+    def __init__(self):
+        self.valid: list[dict[str, Any]] = []
+        self.valid_indexes: list[int] = []
+        self.errors: dict[int, list[dict]] = dict()
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return f"BatchValidation(valid={len(self.valid)}, invalid={len(self.errors)})"
+
+
+def get_list_adapter(model: DeclarativeMeta, variant: str = "create"):
+    """`TypeAdapter` of the list of the schema, cached like the schemas."""
+
+    if (model, variant) not in _list_adapters:
+        schema = generate_pydantic_model(model, variant)
+        _list_adapters[(model, variant)] = TypeAdapter(list[schema])
+    return _list_adapters[(model, variant)]
+
+
+def validate_many(
+        model: DeclarativeMeta,
+        rows: Sequence[dict],
+        variant: str = "create",
+) -> BatchValidation:
+    """
+    Validates the whole list of rows, the errors are grouped by the row
+    indexes.
+
+    With pydantic v2 the list is validated with one call of the
+    validator; if some rows are invalid, the remaining rows are
+    validated once more. Pydantic v1 has no faster way for lists than
+    a loop over the rows, so there it is one pass with the schema.
+    """
+
+    result = BatchValidation()
+
+    if TypeAdapter is None:
+        schema = generate_pydantic_model(model, variant)
+        (valid, valid_indexes) = (result.valid, result.valid_indexes)
+        for (index, row) in enumerate(rows):
+            try:
+                obj = schema(**row)
+            except ValidationError as exc:
+                result.errors[index] = exc.errors()
+                continue
+            valid.append(obj.dict(exclude_unset=True))
+            valid_indexes.append(index)
+        return result
+
+    adapter = get_list_adapter(model, variant)
+    try:
+        objects = adapter.validate_python(rows)
+        result.valid_indexes = list(range(len(rows)))
+    except ValidationError as exc:
+        for error in exc.errors():
+            (index, *loc) = error["loc"]
+            error["loc"] = tuple(loc)
+            result.errors.setdefault(index, []).append(error)
+        result.valid_indexes = [i for i in range(len(rows)) if i not in result.errors]
+        objects = adapter.validate_python([rows[i] for i in result.valid_indexes])
+
+    result.valid = [obj.model_dump(exclude_unset=True) for obj in objects]
+    return result
@@ -0,0 +1,343 @@
+"""
+A tool that records the queries executed through the engine and
+suggests indexes for them.
+
+>>> with IndexAdvisor() as advisor:
+>>>     run_load_test()
+>>> print(advisor.report())
+>>> # UserModel: Info.indexes += ["login"]  # 512.204 ms, 1200 queries (full scan)
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, ClauseList
+from sqlalchemy.sql.schema import Column, Index, Table
+from sqlalchemy.sql.selectable import Alias, Select
+from sqlalchemy.sql.visitors import iterate
+
+from ..managers.session import DbEngine
+from ..models.base import ModelWorker, BaseModelMeta
+
+
+__all_for_module__ = ["IndexAdvisor"]
+__all__ = __all_for_module__ + ["QueryRecord", "IndexSuggestion"]
+
+
+EQUALITY_OPERATORS = {operators.eq, operators.in_op, operators.is_}
+RANGE_OPERATORS = {
+    operators.gt,
+    operators.ge,
+    operators.lt,
+    operators.le,
+    operators.between_op,
+    operators.like_op,
+}
+
+scan_pattern = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$")
+automatic_pattern = re.compile(
+    r"^SEARCH (?:TABLE )?(\w+)(?: AS (\w+))? USING AUTOMATIC .*INDEX \((.*)\)")
+temp_btree_pattern = re.compile(r"^USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY")
+
+
+def is_partial(index: Index) -> bool:
+    """Whether the index has a `WHERE` condition (`sqlite_where`, ...)."""
+
+    return any(
+        name.endswith("_where") and value is not None
+        for (name, value) in index.dialect_kwargs.items()
+    )
+
+
+class QueryRecord:
+    """Statistics of one SQL statement during the recording."""
+
+    def __init__(self, statement: str, parameters: Any, construct: Any):
+        self.statement = statement
+        self.parameters = parameters
+        self.construct = construct
+        self.count = 0
+        self.total_time = 0.0
+
+    def __repr__(self):
+        return "QueryRecord(count={}, time={:.3f} ms, statement={!r})".format(
+            self.count,
+            self.total_time * 1000,
+            self.statement[:60],
+        )
+
+
+class IndexSuggestion:
+    """An index that could help with some of the recorded queries."""
+
+    def __init__(self, model: BaseModelMeta, fields: tuple[str, ...]):
+        self.model = model
+        self.fields = fields
+        self.reasons = set()
+        self.count = 0
+        self.total_time = 0.0
+
+    @property
+    def info_entry(self) -> str | tuple[str, ...]:
+        """The value to be written to the `Info.indexes` of the model."""
+        return self.fields[0] if len(self.fields) == 1 else self.fields
+
+    def __str__(self):
+        suggestion = f"{self.model.__name__}: Info.indexes += [{self.info_entry!r}]"
+        statistics = "{:.3f} ms, {} queries ({})".format(
+            self.total_time * 1000,
+            self.count,
+            ", ".join(sorted(self.reasons)),
+        )
+        return f"{suggestion}  # {statistics}"
+
+    def __repr__(self):
+        return f"IndexSuggestion({self.model.__name__}, {self.fields})"
+
+
+class IndexAdvisor:
+    """
+    Records the statements executed through the engine (by default
+    `DbEngine`), then runs `EXPLAIN QUERY PLAN` on them and looks for
+    full table scans, temporary B-tree sorts and automatic indexes.
+
+    For each such place it suggests an index for `Info.indexes` of the
+    model, the suggestions are ranked by the total time of the queries
+    they would help.
+
+    Only SQLite query plans are supported.
+    """
+
+    def __init__(self, engine: Engine = DbEngine):
+        if engine.dialect.name != "sqlite":
+            raise ValueError("Index advisor only supports SQLite query plans")
+
+        self.engine = engine
+        self.records: dict[str, QueryRecord] = dict()
+        self.is_recording = False
+
+    def __enter__(self) -> IndexAdvisor:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # ======== RECORDING ========
+
+    def start(self):
+        event.listen(self.engine, "before_cursor_execute", self.before_execute)
+        event.listen(self.engine, "after_cursor_execute", self.after_execute)
+        self.is_recording = True
+
+    def stop(self):
+        if not self.is_recording:
+            return
+        event.remove(self.engine, "before_cursor_execute", self.before_execute)
+        event.remove(self.engine, "after_cursor_execute", self.after_execute)
+        self.is_recording = False
+
+    def clear(self):
+        self.records = dict()
+
+    @staticmethod
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("index_advisor_start", []).append(time.perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["index_advisor_start"].pop()
+
+        command = statement.lstrip()[:6].upper()
+        is_explainable = command in ("SELECT", "UPDATE", "DELETE")
+        compiled = getattr(context, "compiled", None)
+        if not is_explainable or compiled is None:
+            return
+
+        record = self.records.get(statement)
+        if record is None:
+            if executemany:
+                parameters = parameters[0]
+            record = QueryRecord(statement, parameters, compiled.statement)
+            self.records[statement] = record
+        record.count += 1
+        record.total_time += elapsed
+
+    # ======== ANALYSIS ========
+
+    def analyze(self) -> list[IndexSuggestion]:
+        """Returns index suggestions, the most useful first."""
+
+        models = {
+            mapper.class_.__tablename__: mapper.class_
+            for mapper in ModelWorker.registry.mappers
+        }
+
+        suggestions: dict[tuple, IndexSuggestion] = dict()
+        with self.engine.connect() as conn:
+            for record in list(self.records.values()):
+                plan = conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + record.statement,
+                    record.parameters,
+                ).fetchall()
+                details = [row[3] for row in plan]
+
+                for (table, fields, reason) in self.find_problems(record, details):
+                    model = models.get(table.name)
+                    if model is None or self.is_indexed(table, fields):
+                        continue
+
+                    key = (model, fields)
+                    if key not in suggestions:
+                        suggestions[key] = IndexSuggestion(model, fields)
+                    suggestion = suggestions[key]
+                    suggestion.reasons.add(reason)
+                    suggestion.count += record.count
+                    suggestion.total_time += record.total_time
+
+        return sorted(
+            suggestions.values(),
+            key=lambda s: s.total_time,
+            reverse=True,
+        )
+
+    def suggestions_by_model(self) -> dict[BaseModelMeta, list[IndexSuggestion]]:
+        result = dict()
+        for suggestion in self.analyze():
+            result.setdefault(suggestion.model, []).append(suggestion)
+        return result
+
+    def report(self) -> str:
+        suggestions = self.analyze()
+        if not suggestions:
+            return "No index suggestions"
+        return "\n".join(str(suggestion) for suggestion in suggestions)
+
+    def find_problems(
+            self,
+            record: QueryRecord,
+            details: list[str],
+    ) -> list[tuple[Table, tuple[str, ...], str]]:
+        """
+        Finds the places in the query plan that an index can fix and the
+        columns for that index.
+        """
+
+        statement = record.construct
+        names = self.get_from_names(statement)
+        (equality, ranges) = self.get_filter_columns(statement)
+
+        problems = []
+        for detail in details:
+            if match := automatic_pattern.match(detail):
+                (table, alias, constraints) = match.groups()
+                fields = tuple(
+                    part.split("=")[0].strip()
+                    for part in constraints.split(" AND ")
+                )
+                problems.append((names.get(alias or table), fields, "automatic index"))
+
+            elif match := scan_pattern.match(detail):
+                (table, alias, rest) = match.groups()
+                if "INDEX" in rest:
+                    continue
+                name = alias or table
+                fields = equality.get(name, []) + ranges.get(name, [])[:1]
+                if fields:
+                    problems.append((names.get(name), tuple(fields), "full scan"))
+
+            elif temp_btree_pattern.match(detail):
+                order = self.get_order_columns(statement)
+                order_tables = {column.table.name for column in order}
+                if len(order_tables) != 1:
+                    continue
+                name = order_tables.pop()
+                fields = equality.get(name, []) + [
+                    column.name
+                    for column in order
+                    if column.name not in equality.get(name, [])
+                ]
+                problems.append((names.get(name), tuple(fields), "temp b-tree sort"))
+
+        return [problem for problem in problems if problem[0] is not None]
+
+    @staticmethod
+    def get_from_names(statement) -> dict[str, Table]:
+        """Names of tables and aliases used in the query."""
+
+        names = dict()
+        for element in iterate(statement):
+            if isinstance(element, Table):
+                names.setdefault(element.name, element)
+            elif isinstance(element, Alias) and isinstance(element.element, Table):
+                names[element.name] = element.element
+        return names
+
+    @staticmethod
+    def get_filter_columns(statement) -> tuple[dict[str, list], dict[str, list]]:
+        """
+        Columns from the `WHERE` clause, divided into those that are
+        compared for equality and those that are compared by range, and
+        grouped by the table (or alias) name.
+        """
+
+        where = getattr(statement, "whereclause", None)
+        equality = dict()
+        ranges = dict()
+        if where is None:
+            return equality, ranges
+
+        for element in iterate(where):
+            if not isinstance(element, BinaryExpression):
+                continue
+            if element.operator in EQUALITY_OPERATORS:
+                target = equality
+            elif element.operator in RANGE_OPERATORS:
+                target = ranges
+            else:
+                continue
+
+            for side in (element.left, element.right):
+                if isinstance(side, Column) and side.table is not None:
+                    columns = target.setdefault(side.table.name, [])
+                    if side.name not in columns:
+                        columns.append(side.name)
+
+        return equality, ranges
+
+    @staticmethod
+    def get_order_columns(statement) -> list[Column]:
+        if not isinstance(statement, Select):
+            return []
+
+        order_by: ClauseList = statement._order_by_clause
+        columns = []
+        for element in order_by.clauses:
+            column = getattr(element, "element", element)  # `.desc()`
+            if isinstance(column, Column) and column.table is not None:
+                columns.append(column)
+        return columns
+
+    @staticmethod
+    def is_indexed(table: Table, fields: tuple[str, ...]) -> bool:
+        """
+        Whether an existing index already starts with these columns.
+        Partial indexes do not count, they only cover some of the rows
+        and are used only by the queries with their condition.
+        """
+
+        existing = [
+            [column.name for column in index.columns]
+            for index in table.indexes
+            if not is_partial(index)
+        ]
+        existing.append([column.name for column in table.primary_key.columns])
+        return any(
+            tuple(columns[:len(fields)]) == fields
+            for columns in existing
+        )
@@ -10,7 +10,7 @@ import time
 import random
 import string
 from pathlib import Path
-from typing import Sequence, Generator, Callable
+from typing import Sequence, Generator, Callable, Iterable
 
 
 __all_for_module__ = [
@@ -27,6 +27,7 @@ __all__ = __all_for_module__ + [
     "default_alphabet",
     "advanced_alphabet",
     "get_all_files_from_directory_generator",
+    "chunked",
 ]
 
 
@@ -178,6 +179,30 @@ def get_all_files_from_directory(
 # ======================================================================
 
 
+def chunked(iterable: Iterable, size: int) -> Generator[list, None, None]:
+    """
+    Splits the iterable into lists of `size` elements (the last one can
+    be shorter). The iterable is read lazily, chunk by chunk.
+
+    >>> list(chunked(range(5), 2))  # [[0, 1], [2, 3], [4]]
+    """
+
+    if size < 1:
+        raise ValueError("Chunk size must be positive")
+
+    chunk = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ======================================================================
+
+
 class frozendict(dict):
 
     @classmethod
@@ -1,14 +1,90 @@
 from pathlib import Path
-from framework.db.utils import FixtureCreator
+from framework.db.utils import FixtureCreator, TableExporter
 from server.models import *
+from server.settings import settings
 
 
-__all__ = ["create_fixtures"]
+__all__ = [
+    "create_fixtures",
+    "sync_fixtures",
+    "export_tables",
+    "FIXTURE_FOLDER_PATH",
+]
 
 
 FIXTURE_FOLDER_PATH = Path(__file__).absolute().parent.absolute()
+FIXTURE_CACHE_PATH = FIXTURE_FOLDER_PATH.parent.parent / ".fixture_cache"
 
+# the tables for analytics and backups, with the fields that are not exported
+EXPORT_TABLES = {
+    PersonModel: [],
+    UserModel: UserModel.Info.deferred["secrets"],
+    ItemModel: [],
+}
+
+
+def get_cache_key() -> str:
+    """
+    What the fixtures depend on besides the files and the tables: the
+    passwords are hashed with the salt and the algorithms of the hasher
+    (`hash_algorithms` in the configs). The algorithms are taken into
+    account by the hash of a fixed string, so it also works for custom
+    algorithm objects.
+    """
+
+    hasher_check = settings.password_hasher("fixtures", "snapshot", "key")
+    return f"{settings.hash_salt}:{hasher_check}"
+
+
+def create_fixtures(use_cache: bool = False, fast: bool = False):
+    """
+    With `use_cache` the database is restored from a snapshot, if the
+    fixtures and models have not changed since it was made. With `fast`
+    the rows are inserted with `FixtureCreator.create_fast`.
+    """
+
+    if use_cache:
+        creator = FixtureCreator()
+        creator.create_cached(
+            FIXTURE_FOLDER_PATH,
+            FIXTURE_CACHE_PATH,
+            extra_key=get_cache_key(),
+        )
+    else:
+        creator = FixtureCreator(FIXTURE_FOLDER_PATH)
+        if fast:
+            creator.create_fast()
+        else:
+            creator.create()
+
+
+def sync_fixtures(dry_run: bool = True, delete_missing: bool = False):
+    """
+    Updates the reference data in the database to the fixtures, see
+    `FixtureCreator.sync`. By default only prints what would be changed.
+    """
 
-def create_fixtures():
     creator = FixtureCreator(FIXTURE_FOLDER_PATH)
-    creator.create()
+    diff = creator.sync(dry_run=dry_run, delete_missing=delete_missing)
+    print(diff)
+    return diff
+
+
+def export_tables(
+        path: str | Path,
+        data_format: str = "ndjson",
+        compress: bool = True,
+) -> dict[str, int]:
+    """
+    Exports the tables of `EXPORT_TABLES` to the files `<table>.<format>`
+    (`.gz` with `compress`) in the folder, see `TableExporter`. Returns
+    the number of rows of each table.
+    """
+
+    counts = dict()
+    for (model, exclude) in EXPORT_TABLES.items():
+        tablename = model.__tablename__
+        filename = f"{tablename}.{data_format}" + (".gz" if compress else "")
+        exporter = TableExporter(model, exclude=exclude)
+        counts[tablename] = exporter.export(Path(path) / filename)
+    return counts
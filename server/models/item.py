@@ -19,6 +19,9 @@ __all__ = ["ItemTypeModel", "CharacteristicItemModel", "ItemModel"]
 class ItemTypeModel(BaseModel):
     name = StringField(20, nullable=False)
 
+    class Info:
+        natural_key = "name"
+
 
 class CharacteristicItemModel(BaseModel):
     id = IdField(autoincrement=False)
@@ -36,6 +39,7 @@ class CharacteristicItemModel(BaseModel):
 
     class Info:
         default_pk = False
+        natural_key = ("item_id", "characteristic_token")
 
 
 class ItemModel(BaseModel):
@@ -45,7 +49,13 @@ class ItemModel(BaseModel):
     characteristics = ManyToManyField(
         CharacteristicModel,
         backref="items",
+        lazy="selectin",
         through=CharacteristicItemModel,
     )
-    shops = ManyToManyField(ShopModel)
+    shops = ManyToManyField(ShopModel, lazy="selectin")
     min_level = IntegerField(default=0)
+
+    class Info:
+        deferred = ["description"]
+        natural_key = "name"
+        load_only = {"listing": ["name", "item_type_id", "min_level"]}
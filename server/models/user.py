@@ -39,7 +39,19 @@ class UserModel(BaseModel):
     last_login = DateTimeField()
     is_deleted = BooleanField(default=False, nullable=False)
 
-    @attribute_presetter("password")
+    class Info:
+        indexes = [
+            "token",
+            # lookups by login at authorization
+            "login",
+        ]
+        # needed only for authorization, not for the user listings
+        deferred = {"secrets": ["password", "pepper", "token"]}
+        natural_key = "login"
+        load_only = {"listing": ["login", "name"]}
+
+    # deferred until flush, when `pepper` is already set
+    @attribute_presetter("password", deferred=True)
     def password_setter(self, value):
         return self.generate_password(value)
 
@@ -59,6 +71,12 @@ class PersonModel(BaseModel):
     level = IntegerField(default=1, nullable=False)
     experience = IntegerField(default=0, nullable=False)
     money = IntegerField(default=0, nullable=False)
-    rating = IntegerField(default=0, nullable=False)
+    rating = IntegerField(default=0, nullable=False, index=True)
     kill_ratio = CoefficientField(default=0.0, nullable=False)
     fights_count = PositiveIntegerField(default=0, nullable=False)
+
+    class Info:
+        # money and statistics are changed by concurrent fights and
+        # purchases, which are retried with `retry_on_stale`
+        versioned = True
+        natural_key = "user_id"
@@ -1 +1,8 @@
-__all__ = []
+from .test_fixtures import __all__ as __fixtures_all__
+from .test_models import __all__ as __models_all__
+
+from .test_fixtures import *
+from .test_models import *
+
+
+__all__ = __fixtures_all__ + __models_all__
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from framework.db.managers import DbEngine, db_session
+from framework.db.models import ModelWorker
+from framework.db.utils import FixtureCreator
+from server.fixtures import FIXTURE_FOLDER_PATH
+
+
+__all__ = ["FixturesTest"]
+
+
+# generated or hashed on creation, different each time
+VOLATILE_COLUMNS = {"password", "pepper", "token", "created"}
+
+
+class FixturesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def setUp(self):
+        self.tables = [
+            table
+            for table in ModelWorker.metadata.sorted_tables
+            if not table.name.startswith(("test_", "m2m_test_"))
+        ]
+        self.clear()
+
+    def tearDown(self):
+        self.clear()
+
+    def clear(self):
+        # the tables are created again, so the ids start from 1
+        db_session.session.close()
+        ModelWorker.metadata.drop_all(DbEngine, tables=self.tables)
+        ModelWorker.metadata.create_all(DbEngine, tables=self.tables)
+
+    def get_rows(self) -> dict[str, list[tuple]]:
+        result = dict()
+        for table in self.tables:
+            columns = [
+                column
+                for column in table.columns
+                if column.name not in VOLATILE_COLUMNS
+            ]
+            statement = table.select().with_only_columns(*columns)
+            rows = db_session.session.execute(statement.order_by(*columns))
+            result[table.name] = [tuple(row) for row in rows]
+        return result
+
+    def test_create_fast(self):
+        # the same ids and links, whichever way the fixtures are created
+        FixtureCreator(FIXTURE_FOLDER_PATH).create()
+        expected = self.get_rows()
+        self.assertTrue(expected["item"])
+
+        self.clear()
+        FixtureCreator(FIXTURE_FOLDER_PATH).create_fast()
+        self.assertEqual(self.get_rows(), expected)
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from sqlalchemy import select
+
+from framework.db.managers import DbEngine, db_session
+from framework.db.models import ModelWorker
+from server.models import ItemModel, UserModel
+
+
+__all__ = ["UserModelTest", "ItemModelTest"]
+
+
+class UserModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ModelWorker.metadata.create_all(DbEngine)
+
+    def get_plan(self, statement) -> str:
+        sql = statement.compile(DbEngine, compile_kwargs={"literal_binds": True})
+        connection = db_session.session.connection()
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+        return " ".join(row[-1] for row in plan)
+
+    def test_login_lookup(self):
+        # authorization looks users up only by login
+        plan = self.get_plan(select(UserModel.id).where(UserModel.login == "admin"))
+        self.assertIn("ix_user_login", plan)
+        self.assertNotIn("SCAN", plan)
+
+        # a single index over the login
+        indexes = [
+            index for index in UserModel.__table__.indexes
+            if "login" in index.columns
+        ]
+        self.assertEqual([index.name for index in indexes], ["ix_user_login"])
+
+
+class ItemModelTest(TestCase):
+    def test_link_custom_through(self):
+        # the links of characteristics also need an id and a value
+        with self.assertRaises(ValueError):
+            ItemModel.m2m_link("characteristics", [(1, "strength")])